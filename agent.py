@@ -1,41 +1,176 @@
 import logging
 import json
 import os
+import re
+from collections import OrderedDict, deque
 from typing import Dict, Any, List, Optional
 from tools.base import Tool
 from config import config
 
+# orjson is 2-5x faster than stdlib json for both directions; fall back
+# transparently when it is not installed.
+try:
+    import orjson
+
+    def _json_dumps(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2, default=str).decode()
+
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj: Any) -> str:
+        return json.dumps(obj, indent=2, default=str)
+
+    _json_loads = json.loads
+
 logger = logging.getLogger(__name__)
 
+# Single compiled pattern for the rule-based fast path in parse_intent. One
+# regex pass replaces the per-intent keyword loops: the first named group that
+# matches selects the intent via a dispatch on m.lastgroup. Flashcards routing
+# lives in exactly one place (the group below) — keep it that way.
+_INTENT_RE = re.compile(
+    r"(?P<quiz>\bquiz\b)"
+    r"|(?P<flashcards>\bflashcards?\b|\banki\b|\bstudy cards\b)"
+    r"|(?P<recall>\btest my knowledge\b|\bactive recall\b)"
+    r"|(?P<viz>\bvisuali[sz]e\b|\bdiagram\b|\bflowchart\b)"
+    r"|(?P<search>\bsearch for\b|\blook up\b|\bgoogle\b)"
+    r"|(?P<tts>\bspeak\b|\bread aloud\b)",
+    re.IGNORECASE,
+)
+
+# Extracts the topic/payload of a request ("quiz me on X") in one pass.
+_TOPIC_RE = re.compile(r"\b(?:on|about|for)\s+(.+)$", re.IGNORECASE)
+
+# Question-style openers are by far the most common input, and they belong to
+# the LLM router (which weighs the full context), so check them first with a
+# cheap prefix test before paying for the keyword scan.
+_QA_PREFIXES = ("explain", "what is", "what are", "who is", "who are",
+                "how does", "how do", "why")
+
+
+def _match_intent_keywords(user_input: str, lowered: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Single-pass keyword match that routes clear-cut tool requests.
+
+    Returns an intent dict compatible with parse_intent, or None when the
+    input is ambiguous and should go through the LLM router instead.
+    """
+    if lowered is None:
+        lowered = user_input.lower()
+    if lowered.startswith(_QA_PREFIXES):
+        return None
+
+    m = _INTENT_RE.search(user_input)
+    if m is None:
+        return None
+    matched_intent = m.lastgroup
+
+    topic_match = _TOPIC_RE.search(user_input)
+    topic = topic_match.group(1).strip() if topic_match else None
+
+    if matched_intent == "quiz" and topic:
+        return {"intent": "quiz", "args": {"topic": topic}}
+    if matched_intent == "flashcards" and topic:
+        return {"intent": "flashcards", "args": {"action": "generate", "topic": topic}}
+    if matched_intent == "recall" and topic:
+        return {"intent": "recall", "args": {"topic": topic}}
+    if matched_intent == "viz":
+        return {"intent": "viz", "args": {"kind": "mermaid", "content": user_input}}
+    if matched_intent == "search" and topic:
+        return {"intent": "search", "args": {"query": topic}}
+    if matched_intent == "tts":
+        return {"intent": "tts", "args": {"text": user_input}}
+
+    # Keyword hit but no extractable payload — let the LLM figure it out.
+    return None
+
+
+_INTENT_CACHE_MAX = 128
+
+# Greetings and acknowledgements that never need routing — they go straight
+# to chat without touching the keyword scan or the LLM.
+_TRIVIAL_CHAT = frozenset({"hi", "hello", "hey", "thanks", "thank you",
+                           "ok", "okay", "yes", "no", "bye"})
+
+
 class Agent:
     def __init__(self):
         self.tools: Dict[str, Tool] = {}
-        self.conversation_history: List[Dict[str, str]] = []
+        self._dispatch: Dict[str, Any] = {}
+        self.conversation_history: deque = deque(maxlen=40)
+        self._intent_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._tools_spec_cache: Optional[str] = None
+        self._ctx_serial_cache: Optional[tuple] = None
+        self._ctx_version = 0
+        self._ctx_cache: Optional[tuple] = None
         self.discover_and_register_tools()
+        # Resolved once: the registry is fixed after construction, and the
+        # CLI helpers and context building hit this on every turn.
+        self.context_manager = self.tools.get('context_manager')
 
     def discover_and_register_tools(self):
+        """Register tools from the static registry (or scan in dev mode)."""
+        if config.DEV_MODE:
+            self._discover_tools_dynamically()
+            return
+        from tools import REGISTERED_TOOL_CLASSES
+        for tool_class in REGISTERED_TOOL_CLASSES:
+            try:
+                self.register_tool(tool_class())
+            except Exception as e:
+                logger.error("Failed to instantiate tool %s: %s", tool_class.__name__, e)
+
+    def _discover_tools_dynamically(self):
         """Dynamically discover and register tools from the tools directory."""
         tools_dir = os.path.join(os.path.dirname(__file__), "tools")
         for filename in os.listdir(tools_dir):
-            if filename.endswith(".py") and filename not in ["__init__.py", "base.py", "persist.py"]:
+            # Underscore-prefixed modules are internal helpers, not tools.
+            if (filename.endswith(".py") and not filename.startswith("_")
+                    and filename not in ["base.py", "persist.py"]):
                 module_name = f"tools.{filename[:-3]}"
                 try:
                     module = __import__(module_name, fromlist=["*"])
                     for attr_name in dir(module):
                         attr = getattr(module, attr_name)
-                        if (isinstance(attr, type) and 
-                            issubclass(attr, Tool) and 
-                            attr is not Tool):
+                        # The __module__ check keeps classes a module merely
+                        # imports (e.g. PersistTool, ContextManagerTool) from
+                        # being registered on its behalf — each tool is picked
+                        # up only from the file that defines it.
+                        if (isinstance(attr, type) and
+                            issubclass(attr, Tool) and
+                            attr is not Tool and
+                            attr.__module__ == module_name):
                             tool_instance = attr()
                             self.register_tool(tool_instance)
                 except Exception as e:
-                    logger.error(f"Failed to load tool from {module_name}: {e}")
+                    logger.error("Failed to load tool from %s: %s", module_name, e)
 
     def register_tool(self, tool: Tool):
         self.tools[tool.name] = tool
-        logger.debug(f"Registered tool: {tool.name}")
+        # Bound methods are resolved once here so dispatch is a single dict
+        # lookup instead of two lookups plus attribute traversal per request.
+        self._dispatch[tool.name] = tool.execute
+        self._tools_spec_cache = None
+        logger.debug("Registered tool: %s", tool.name)
 
     def _get_tools_specification(self) -> str:
+        """Return the tools specification, serialized once per registration."""
+        if self._tools_spec_cache is None:
+            self._tools_spec_cache = self._compute_tools_specification()
+        return self._tools_spec_cache
+
+    def _serialize_enhanced_context(self, ctx: Dict[str, Any]) -> str:
+        """Serialize the enhanced context, reusing the last result while unchanged."""
+        try:
+            fingerprint = hash(repr(sorted(ctx.items())))
+        except TypeError:
+            fingerprint = hash(repr(ctx))
+        if self._ctx_serial_cache is not None and self._ctx_serial_cache[0] == fingerprint:
+            return self._ctx_serial_cache[1]
+        ctx_str = _json_dumps(ctx)
+        self._ctx_serial_cache = (fingerprint, ctx_str)
+        return ctx_str
+
+    def _compute_tools_specification(self) -> str:
         """Generate a string representation of available tools and their schemas."""
         specs = []
         for name, tool in self.tools.items():
@@ -45,25 +180,60 @@ class Agent:
                 "parameters": tool.input_schema
             }
             specs.append(spec)
-        return json.dumps(specs, indent=2)
+        return _json_dumps(specs)
 
     def parse_intent(self, user_input: str) -> Dict[str, Any]:
         """
         Parse the user input using LLM to determine the intent and arguments.
         """
+        # Normalize exactly once per request; every downstream consumer (cache
+        # key, keyword scan, LLM prompt) reuses these instead of re-allocating
+        # lowered/stripped copies.
+        user_input = user_input.strip()
+        if not user_input:
+            return {"intent": "chat", "args": {"message": ""}}
+        lowered = user_input.lower()
+        if lowered in _TRIVIAL_CHAT:
+            return {"intent": "chat", "args": {"message": user_input}}
+
+        # Repeated inputs ("quiz me on python" typed twice) return the cached
+        # intent without re-scanning or re-calling the LLM. The model name is
+        # part of the key so a model swap invalidates LLM-derived entries.
+        cache_key = f"{config.OLLAMA_MODEL}:{lowered}"
+        cached = self._intent_cache.get(cache_key)
+        if cached is not None:
+            self._intent_cache.move_to_end(cache_key)
+            return cached
+
+        intent_data = self._parse_intent_uncached(user_input, lowered)
+        self._intent_cache[cache_key] = intent_data
+        if len(self._intent_cache) > _INTENT_CACHE_MAX:
+            self._intent_cache.popitem(last=False)
+        return intent_data
+
+    def _parse_intent_uncached(self, user_input: str, lowered: Optional[str] = None) -> Dict[str, Any]:
+        """Compute the intent for an input not found in the LRU cache."""
+        # Fast path: a single keyword scan routes unambiguous tool requests
+        # without paying for an LLM round-trip.
+        fast_intent = _match_intent_keywords(user_input, lowered)
+        if fast_intent is not None:
+            return fast_intent
+
         try:
             import ollama
             
             tools_spec = self._get_tools_specification()
             enhanced_context = self.get_enhanced_chat_context()
-            
+            ctx_str = self._serialize_enhanced_context(
+                enhanced_context.get('enhanced_context') or {})
+
             system_prompt = f"""You are a tool router for StudBotty. Your job is to analyze the user's input and decide which tool to call and with what arguments.
 
 AVAILABLE TOOLS:
 {tools_spec}
 
 USER CONTEXT:
-{json.dumps(enhanced_context.get('enhanced_context', {}), indent=2)}
+{ctx_str}
 
 RESPONSE FORMAT:
 Return ONLY a JSON object with the following structure:
@@ -86,11 +256,11 @@ If the user wants a quiz, use the "quiz" tool.
                 format='json'
             )
             
-            intent_data = json.loads(response['message']['content'])
+            intent_data = _json_loads(response['message']['content'])
             return intent_data
             
         except Exception as e:
-            logger.error(f"Error parsing intent: {e}")
+            logger.error("Error parsing intent: %s", e)
             # Fallback to chat if LLM parsing fails
             return {"intent": "chat", "args": {"message": user_input}}
 
@@ -99,30 +269,63 @@ If the user wants a quiz, use the "quiz" tool.
         intent = intent_data.get("intent")
         args = intent_data.get("args", {})
         
-        logger.info(f"Routing intent: {intent} with args: {args}")
+        logger.info("Routing intent: %s with args: %r", intent, args)
 
         try:
-            if intent in self.tools:
+            execute = self._dispatch.get(intent)
+            if execute is not None:
                 # For chat interactions, pass enhanced context
                 if intent == "chat":
                     enhanced_context = self.get_enhanced_chat_context()
-                    chat_args = {
-                        **args,
-                        'conversation_context': enhanced_context.get('conversation_history', []),
-                        'use_enhanced_context': True
-                    }
-                    result = self.tools[intent].execute(**chat_args)
+                    # Shallow-copy before mutating: args may be shared with a
+                    # cached intent dict. Still cheaper than the double-star
+                    # merge, which re-hashed every key.
+                    args = dict(args)
+                    args['conversation_context'] = enhanced_context.get('conversation_history', [])
+                    args['use_enhanced_context'] = True
+                    result = execute(**args)
                     self._add_to_conversation_history(args.get("message", ""), result)
                 else:
-                    result = self.tools[intent].execute(**args)
-                
+                    result = execute(**args)
+
                 return result
             else:
                 return f"Error: Tool '{intent}' not found."
         except Exception as e:
-            logger.error(f"Error executing intent {intent}: {e}")
+            logger.error("Error executing intent %s: %s", intent, e)
             return f"Error: {str(e)}"
     
+    def route_and_execute_stream(self, intent_data: Dict[str, Any]):
+        """Yield the response incrementally where the tool supports it.
+
+        Chat responses stream from the model chunk by chunk so the CLI can
+        render them as they arrive; every other tool computes its result in
+        one piece, which is yielded whole.
+        """
+        intent = intent_data.get("intent")
+        if intent == "chat":
+            tool = self.tools.get("chat")
+            execute_stream = getattr(tool, "execute_stream", None)
+            if execute_stream is not None:
+                args = dict(intent_data.get("args", {}))
+                enhanced_context = self.get_enhanced_chat_context()
+                args['conversation_context'] = enhanced_context.get('conversation_history', [])
+                args['use_enhanced_context'] = True
+
+                logger.info("Streaming intent: %s with args: %r", intent, args)
+                parts = []
+                try:
+                    for chunk in execute_stream(**args):
+                        parts.append(chunk)
+                        yield chunk
+                except Exception as e:
+                    logger.error("Error streaming intent %s: %s", intent, e)
+                    yield f"Error: {str(e)}"
+                self._add_to_conversation_history(args.get("message", ""), "".join(parts))
+                return
+
+        yield str(self.route_and_execute(intent_data))
+
     def _add_to_conversation_history(self, user_message: str, bot_response: str):
         """Add user and bot messages to conversation history."""
         self.conversation_history.append({
@@ -133,23 +336,32 @@ If the user wants a quiz, use the "quiz" tool.
             "role": "assistant",
             "content": bot_response
         })
-        
-        if len(self.conversation_history) > 40:
-            self.conversation_history = self.conversation_history[-40:]
-    
+        self._ctx_version += 1
+
     def get_conversation_context(self, max_messages: int = 10) -> List[Dict[str, str]]:
         """Get recent conversation context."""
-        return self.conversation_history[-max_messages:] if self.conversation_history else []
+        return list(self.conversation_history)[-max_messages:] if self.conversation_history else []
     
     def get_enhanced_chat_context(self, max_messages: int = 10) -> Dict[str, Any]:
-        """Get enhanced context including conversation history and context manager data."""
-        context_manager = self.tools.get('context_manager')
-        
-        return {
+        """Get enhanced context including conversation history and context manager data.
+
+        parse_intent and route_and_execute both need this within one turn;
+        the result is cached against a version counter bumped whenever the
+        conversation changes, so the context manager is hit once per turn.
+        """
+        if self._ctx_cache is not None and self._ctx_cache[0] == self._ctx_version:
+            return self._ctx_cache[1]
+
+        context_manager = self.context_manager
+        context = {
             'conversation_history': self.get_conversation_context(max_messages),
             'enhanced_context': context_manager.execute('get_enhanced_context') if context_manager else None
         }
+        self._ctx_cache = (self._ctx_version, context)
+        return context
     
     def clear_conversation_history(self):
         """Clear the conversation history."""
-        self.conversation_history = []
+        self.conversation_history.clear()
+        self._intent_cache.clear()
+        self._ctx_version += 1
@@ -1,14 +1,28 @@
 import os
+import sys
+from dataclasses import dataclass
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+
+# Frozen + slotted so attribute reads go through C-level slot descriptors and
+# the instance carries no per-instance __dict__. Environment variables are
+# read exactly once at import; string values are interned so downstream
+# equality checks (intent == "chat" etc.) hit the pointer fast path.
+@dataclass(frozen=True, slots=True)
 class Config:
-    OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "gemma3:1b")
-    ANKI_CONNECT_URL = os.getenv("ANKI_CONNECT_URL", "http://localhost:8765")
-    OFFLINE_MODE = os.getenv("OFFLINE_MODE", "false").lower() == "true"
-    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
-    PERSISTENCE_FILE = os.getenv("PERSISTENCE_FILE", "studbotty_data.json")
+    OLLAMA_MODEL: str = sys.intern(os.getenv("OLLAMA_MODEL", "gemma3:1b"))
+    ANKI_CONNECT_URL: str = sys.intern(os.getenv("ANKI_CONNECT_URL", "http://localhost:8765"))
+    OFFLINE_MODE: bool = os.getenv("OFFLINE_MODE", "false").lower() == "true"
+    LOG_LEVEL: str = sys.intern(os.getenv("LOG_LEVEL", "INFO"))
+    DEV_MODE: bool = os.getenv("DEV_MODE", "false").lower() == "true"
+    PERSISTENCE_FILE: str = sys.intern(os.getenv("PERSISTENCE_FILE", "studbotty_data.json"))
+    # Kept separate from PERSISTENCE_FILE: the LLM response cache carries
+    # embedding vectors and is rewritten after most model calls, which would
+    # otherwise churn the user-data file (and its mtime) every turn.
+    SEMANTIC_CACHE_FILE: str = sys.intern(os.getenv("SEMANTIC_CACHE_FILE", "studbotty_llm_cache.json"))
+
 
 config = Config()
@@ -1,14 +1,20 @@
+import atexit
+import functools
 import logging
+import queue
 import sys
-import pyttsx3
+import threading
+import time
 import re
 import os
-from rich.console import Console
+from rich.console import Console, Group
+from rich.live import Live
 from rich.logging import RichHandler
+from rich.text import Text
 from rich.prompt import Prompt
+from rich.table import Table
 from rich.panel import Panel
 from rich.markdown import Markdown
-from rich.markup import escape
 from config import config
 from agent import Agent
 
@@ -18,17 +24,30 @@ if not force_simple_output:
     # Try to detect if terminal supports ANSI codes
     # Modern Windows terminals (Windows Terminal, PowerShell, etc.) support ANSI
     if sys.platform == 'win32':
-        # Most modern Windows terminals support rich formatting
-        # Try to initialize colorama for better Windows terminal support
-        try:
-            import colorama
-            colorama.init()
-        except ImportError:
-            # colorama not available, but that's ok - rich can still work
-            pass
-        except Exception:
-            # Colorama initialization failed, but we'll still try rich formatting
-            pass
+        # Windows Terminal and VS Code handle ANSI natively — colorama's
+        # translating stream wrapper would only add per-write overhead
+        # there. Elsewhere, try to switch the console itself into VT mode
+        # and fall back to colorama only for truly legacy consoles.
+        if not (os.environ.get('WT_SESSION') or os.environ.get('TERM_PROGRAM')):
+            try:
+                import ctypes
+                kernel32 = ctypes.windll.kernel32
+                handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+                mode = ctypes.c_uint32()
+                if not kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+                    raise OSError("GetConsoleMode failed")
+                # 0x0004 = ENABLE_VIRTUAL_TERMINAL_PROCESSING
+                kernel32.SetConsoleMode(handle, mode.value | 0x0004)
+            except Exception:
+                try:
+                    import colorama
+                    colorama.init()
+                except ImportError:
+                    # colorama not available, but that's ok - rich can still work
+                    pass
+                except Exception:
+                    # Colorama initialization failed, but we'll still try rich formatting
+                    pass
 
 # Setup logging with fallback
 if force_simple_output:
@@ -39,305 +58,423 @@ if force_simple_output:
         handlers=[logging.StreamHandler()]
     )
 else:
+    # Per-turn info/debug records go through a plain StreamHandler; the
+    # RichHandler (timestamp styling, highlighting, rich tracebacks) only
+    # runs for WARNING and above, where its cost is worth it.
+    _rich_handler = RichHandler(rich_tracebacks=True)
+    _rich_handler.setLevel(logging.WARNING)
+    _plain_handler = logging.StreamHandler()
+    _plain_handler.addFilter(lambda record: record.levelno < logging.WARNING)
     logging.basicConfig(
         level=config.LOG_LEVEL,
         format="%(message)s",
         datefmt="[%X]",
-        handlers=[RichHandler(rich_tracebacks=True)]
+        handlers=[_plain_handler, _rich_handler]
     )
 
 logger = logging.getLogger("studbotty")
 console = Console(force_terminal=not force_simple_output, legacy_windows=force_simple_output)
 
-# Initialize TTS engine with natural voice settings
-tts_engine = pyttsx3.init()
-tts_engine.setProperty('rate', 120)  # Slower speech rate for natural sound
-tts_engine.setProperty('volume', 0.9)  # Volume (0.0 to 1.0)
+# The TTS engine is created lazily on the worker thread: pyttsx3 loads
+# native speech drivers and costs hundreds of ms, which text-only sessions
+# should never pay.
+_tts_engine = None
+
+
+def _get_tts_engine():
+    """Initialize the TTS engine with natural voice settings on first use."""
+    global _tts_engine
+    if _tts_engine is None:
+        import pyttsx3
+        engine = pyttsx3.init()
+        engine.setProperty('rate', 120)  # Slower speech rate for natural sound
+        engine.setProperty('volume', 0.9)  # Volume (0.0 to 1.0)
+
+        # Try to set a female voice if available (usually more natural sounding)
+        voices = engine.getProperty('voices')
+        if len(voices) > 1:
+            engine.setProperty('voice', voices[1].id)  # Often female voice
+        _tts_engine = engine
+    return _tts_engine
 
-# Try to set a female voice if available (usually more natural sounding)
-voices = tts_engine.getProperty('voices')
-if len(voices) > 1:
-    tts_engine.setProperty('voice', voices[1].id)  # Often female voice
 
 voice_mode = False
 
+# The output mode never changes after startup, so the printers are
+# specialized once here instead of branching on force_simple_output at
+# every call site. Call sites always pass rich markup; the simple variants
+# strip it down to plain text.
+if force_simple_output:
+    _SEP = "=" * 50
+    _DASH = "-" * 50
+
+    def emit(message: str) -> None:
+        try:
+            print(Text.from_markup(message).plain)
+        except Exception:
+            print(message)
+
+    def emit_panel(body: str, title: str = "StudBotty") -> None:
+        # One write + flush instead of a print (and potential tty flush)
+        # per frame line.
+        sys.stdout.write(f"\n{_SEP}\n{title}:\n{_DASH}\n{body}\n{_SEP}\n\n")
+        sys.stdout.flush()
+else:
+    # No rich emit_panel: responses on the rich path render through the
+    # Live panel in the REPL loop, so only simple mode needs a framer.
+    def emit(message: str) -> None:
+        console.print(message)
+
+# Command routing: exit commands resolve with one frozenset lookup, and
+# every other colon command dispatches on its head token through a single
+# dict, so routing is two hash lookups regardless of how many commands
+# exist.
+_EXIT_COMMANDS = frozenset({":quit", ":exit", "quit", "exit"})
+# One Status instance reused across turns: start/stop only toggles the live
+# view, instead of rebuilding the renderable and context manager each turn.
+_THINKING_STATUS = None if force_simple_output else console.status(
+    "[bold yellow]Thinking...[/bold yellow]")
+# Serializes the delayed start against the end-of-parse stop: Timer.cancel()
+# cannot stop a callback that is already running, so without the lock a
+# start() straddling the 0.3 s boundary could finish after stop() and leave
+# the Status live — making the next Live() raise "only one live display".
+_SPINNER_LOCK = threading.Lock()
+# Explicit voice commands map straight to the new state; "/voicemode" is a
+# toggle and falls back to negating the current state.
+_VOICE_ACTIONS = {"enable voice mode": True, "voice mode on": True,
+                  "disable voice mode": False, "voice mode off": False}
+
+# The welcome banner is immutable, so both variants are built once at
+# import instead of reconstructing the Panel/markup tree per call.
+_WELCOME_SIMPLE = ("{sep}\n    StudBotty\n{sep}\nWelcome to StudBotty!\n"
+                   "Your AI Study Companion.\nType :help for onboarding.\n{sep}"
+                   ).format(sep="=" * 30)
+_WELCOME_PANEL = None if force_simple_output else Panel.fit(
+    "[bold blue]Welcome to StudBotty![/bold blue]\n"
+    "Your AI Study Companion.\n"
+    "Type [bold cyan]:help[/bold cyan] for onboarding.",
+    title="StudBotty",
+    border_style="blue"
+)
+
+
 def print_welcome():
     if force_simple_output:
-        print("=" * 30)
-        print("    StudBotty")
-        print("=" * 30)
-        print("Welcome to StudBotty!")
-        print("Your AI Study Companion.")
-        print("Type :help for onboarding.")
-        print("=" * 30)
+        print(_WELCOME_SIMPLE)
     else:
-        console.print(Panel.fit(
-            "[bold blue]Welcome to StudBotty![/bold blue]\n"
-            "Your AI Study Companion.\n"
-            "Type [bold cyan]:help[/bold cyan] for onboarding.",
-            title="StudBotty",
-            border_style="blue"
-        ))
+        console.print(_WELCOME_PANEL)
+
+# Help body in rich markup; the simple renderer strips the tags from the
+# same source so the two versions cannot drift apart.
+_HELP_BODY_MARKUP = """
+[bold]🎯 QUICK START:[/bold]
+   Type any question or command to get started!
+
+[bold]📋 AVAILABLE TOOLS:[/bold]
+   • [green]Quiz Tool[/green]     - Test your knowledge with interactive quizzes
+   • [green]Math Tool[/green]     - Solve equations and calculations
+   • [green]Viz Tool[/green]      - Create diagrams and visualizations
+   • [green]Search Tool[/green]   - Find information online
+   • [green]Files Tool[/green]    - Read and analyze files
+   • [green]Flashcards[/green]    - Create study flashcards
+   • [green]Recall Tool[/green]   - Active recall testing with flashcards
+   • [green]Summary Tool[/green]  - Summarize long text into notes
+   • [green]Chat Tool[/green]     - General Q&A and explanations
+   • [green]TTS Tool[/green]      - Text-to-speech for reading aloud
+
+[bold]🎮 COMMANDS:[/bold]
+   [cyan]:help[/cyan]          - Show this guide
+   [cyan]:quit[/cyan]          - Exit StudBotty
+   [cyan]:tools[/cyan]         - List all available tools
+   [cyan]:profile[/cyan]       - Manage your profile
+   [cyan]:topics[/cyan]        - Show important topics
+   [cyan]:preferences[/cyan]   - Set learning preferences
+
+[bold]🔊 VOICE MODE:[/bold]
+   [yellow]enable voice mode[/yellow]    - Turn on speech output
+   [yellow]disable voice mode[/yellow]   - Turn off speech output
+
+[bold]💡 EXAMPLES:[/bold]
+   [italic]'Explain photosynthesis'[/italic]           → [green]Chat Tool[/green]
+   [italic]'Quiz me on python'[/italic]                → [green]Quiz Tool[/green]
+   [italic]'Solve 2 + 2'[/italic]                      → [green]Math Tool[/green]
+   [italic]'Visualize a binary tree'[/italic]          → [green]Viz Tool[/green]
+   [italic]'Search quantum computing'[/italic]         → [green]Search Tool[/green]
+   [italic]'Read file.txt'[/italic]                    → [green]Files Tool[/green]
+   [italic]'Create flashcards on biology'[/italic]     → [green]Flashcards[/green]
+   [italic]'Test my knowledge on math'[/italic]        → [green]Recall Tool[/green]
+   [italic]'Summarize this chapter'[/italic]           → [green]Summary Tool[/green]
+   [italic]'Speak hello world'[/italic]                → [green]TTS Tool[/green]
+
+[bold]🎯 TIPS:[/bold]
+   • Be specific with your requests
+   • Use natural language
+   • Try different tools for different needs
+   • Enable voice mode for audio learning
+"""
+
+
+@functools.lru_cache(maxsize=1)
+def _render_help_simple() -> str:
+    """Render the plain-text help guide once; later :help calls reuse it."""
+    sep = "=" * 60
+    body = Text.from_markup(_HELP_BODY_MARKUP).plain
+    return (f"\n{sep}\n           🚀 STUDBOTTY ONBOARDING GUIDE 🚀\n{sep}\n"
+            f"{body}\n{sep}\n           Ready to start learning? 📚\n{sep}")
+
+
+@functools.lru_cache(maxsize=1)
+def _render_help_rich() -> Group:
+    """Build the rich help renderable once; later :help calls reuse it."""
+    return Group(
+        Panel.fit("[bold blue]🚀 STUDBOTTY ONBOARDING GUIDE 🚀[/bold blue]",
+                  border_style="blue"),
+        Text.from_markup(_HELP_BODY_MARKUP),
+        Panel.fit("[bold green]Ready to start learning? 📚[/bold green]",
+                  border_style="green"),
+    )
+
 
 def print_help():
     """Interactive onboarding system for StudBotty tools and commands."""
     if force_simple_output:
-        # Simple text version for basic terminals
-        print("\n" + "=" * 60)
-        print("           🚀 STUDBOTTY ONBOARDING GUIDE 🚀")
-        print("=" * 60)
-        print("\n🎯 QUICK START:")
-        print("   Type any question or command to get started!")
-        print("\n📋 AVAILABLE TOOLS:")
-        print("   • Quiz Tool     - Test your knowledge with interactive quizzes")
-        print("   • Math Tool     - Solve equations and calculations")
-        print("   • Viz Tool      - Create diagrams and visualizations")
-        print("   • Search Tool   - Find information online")
-        print("   • Files Tool    - Read and analyze files")
-        print("   • Flashcards    - Create study flashcards")
-        print("   • Recall Tool   - Active recall testing with flashcards")
-        print("   • Summary Tool  - Summarize long text into notes")
-        print("   • Chat Tool     - General Q&A and explanations")
-        print("   • TTS Tool      - Text-to-speech for reading aloud")
-        print("\n🎮 COMMANDS:")
-        print("   :help          - Show this guide")
-        print("   :quit          - Exit StudBotty")
-        print("   :tools         - List all available tools")
-        print("   :profile       - Manage your profile")
-        print("   :topics        - Show important topics")
-        print("   :preferences   - Set learning preferences")
-        print("\n🔊 VOICE MODE:")
-        print("   enable voice mode    - Turn on speech output")
-        print("   disable voice mode   - Turn off speech output")
-        print("\n💡 EXAMPLES:")
-        print("   'Explain photosynthesis'           → Chat Tool")
-        print("   'Quiz me on python'                → Quiz Tool")
-        print("   'Solve 2 + 2'                      → Math Tool")
-        print("   'Visualize a binary tree'          → Viz Tool")
-        print("   'Search quantum computing'         → Search Tool")
-        print("   'Read file.txt'                    → Files Tool")
-        print("   'Create flashcards on biology'     → Flashcards")
-        print("   'Test my knowledge on math'        → Recall Tool")
-        print("   'Summarize this chapter'           → Summary Tool")
-        print("   'Speak hello world'                → TTS Tool")
-        print("\n🎯 TIPS:")
-        print("   • Be specific with your requests")
-        print("   • Use natural language")
-        print("   • Try different tools for different needs")
-        print("   • Enable voice mode for audio learning")
-        print("\n" + "=" * 60)
-        print("           Ready to start learning? 📚")
-        print("=" * 60)
+        print(_render_help_simple())
     else:
-        # Rich formatted version with colors and emojis
-        console.print(Panel.fit(
-            "[bold blue]🚀 STUDBOTTY ONBOARDING GUIDE 🚀[/bold blue]",
-            border_style="blue"
-        ))
-        
-        console.print("\n[bold]🎯 QUICK START:[/bold]")
-        console.print("   Type any question or command to get started!")
-        
-        console.print("\n[bold]📋 AVAILABLE TOOLS:[/bold]")
-        console.print("   • [green]Quiz Tool[/green]     - Test your knowledge with interactive quizzes")
-        console.print("   • [green]Math Tool[/green]     - Solve equations and calculations")
-        console.print("   • [green]Viz Tool[/green]      - Create diagrams and visualizations")
-        console.print("   • [green]Search Tool[/green]   - Find information online")
-        console.print("   • [green]Files Tool[/green]    - Read and analyze files")
-        console.print("   • [green]Flashcards[/green]    - Create study flashcards")
-        console.print("   • [green]Recall Tool[/green]   - Active recall testing with flashcards")
-        console.print("   • [green]Summary Tool[/green]  - Summarize long text into notes")
-        console.print("   • [green]Chat Tool[/green]     - General Q&A and explanations")
-        console.print("   • [green]TTS Tool[/green]      - Text-to-speech for reading aloud")
-        
-        console.print("\n[bold]🎮 COMMANDS:[/bold]")
-        console.print("   [cyan]:help[/cyan]          - Show this guide")
-        console.print("   [cyan]:quit[/cyan]          - Exit StudBotty")
-        console.print("   [cyan]:tools[/cyan]         - List all available tools")
-        console.print("   [cyan]:profile[/cyan]       - Manage your profile")
-        console.print("   [cyan]:topics[/cyan]        - Show important topics")
-        console.print("   [cyan]:preferences[/cyan]   - Set learning preferences")
-        
-        console.print("\n[bold]🔊 VOICE MODE:[/bold]")
-        console.print("   [yellow]enable voice mode[/yellow]    - Turn on speech output")
-        console.print("   [yellow]disable voice mode[/yellow]   - Turn off speech output")
-        
-        console.print("\n[bold]💡 EXAMPLES:[/bold]")
-        console.print("   [italic]'Explain photosynthesis'[/italic]           → [green]Chat Tool[/green]")
-        console.print("   [italic]'Quiz me on python'[/italic]                → [green]Quiz Tool[/green]")
-        console.print("   [italic]'Solve 2 + 2'[/italic]                      → [green]Math Tool[/green]")
-        console.print("   [italic]'Visualize a binary tree'[/italic]          → [green]Viz Tool[/green]")
-        console.print("   [italic]'Search quantum computing'[/italic]         → [green]Search Tool[/green]")
-        console.print("   [italic]'Read file.txt'[/italic]                    → [green]Files Tool[/green]")
-        console.print("   [italic]'Create flashcards on biology'[/italic]     → [green]Flashcards[/green]")
-        console.print("   [italic]'Test my knowledge on math'[/italic]        → [green]Recall Tool[/green]")
-        console.print("   [italic]'Summarize this chapter'[/italic]           → [green]Summary Tool[/green]")
-        console.print("   [italic]'Speak hello world'[/italic]                → [green]TTS Tool[/green]")
-        
-        console.print("\n[bold]🎯 TIPS:[/bold]")
-        console.print("   • Be specific with your requests")
-        console.print("   • Use natural language")
-        console.print("   • Try different tools for different needs")
-        console.print("   • Enable voice mode for audio learning")
-        
-        console.print(Panel.fit(
-            "[bold green]Ready to start learning? 📚[/bold green]",
-            border_style="green"
-        ))
+        console.print(_render_help_rich())
+
+# Sentence boundaries used to chunk speech so playback can start on the
+# first sentence instead of waiting for the whole response to synthesize.
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Compiled once at import — recompiling this on every speak() call cost more
+# than the substitution itself for short responses.
+_EMOJI_RE = re.compile(
+    "["
+    "\U0001F600-\U0001F64F"  # emoticons
+    "\U0001F300-\U0001F5FF"  # symbols & pictographs
+    "\U0001F680-\U0001F6FF"  # transport & map symbols
+    "\U0001F1E0-\U0001F1FF"  # flags (iOS)
+    "\U00002500-\U00002BEF"  # chinese char
+    "\U00002702-\U000027B0"
+    "\U000024C2-\U0001F251"
+    "\U0001f926-\U0001f937"
+    "\U00010000-\U0010ffff"
+    "♀-♂"
+    "☀-⭕"
+    "‍"
+    "⏏"
+    "⏩"
+    "⌚"
+    "️"
+    "〰"
+    "]+", flags=re.UNICODE
+)
+
+
+# A single persistent worker owns the TTS engine and drains this queue, so
+# speak() never touches the engine from the REPL thread and successive
+# responses don't each pay for thread start-up. Playback of one response
+# overlaps parsing/rendering of the next turn. The queue is bounded so a
+# burst of long responses cannot pile up unbounded backlog; overflow
+# segments are dropped (speech is best-effort).
+_tts_queue: "queue.Queue" = queue.Queue(maxsize=32)
+_tts_thread = None
+
+
+def _tts_worker():
+    """Play queued sentence segments in order on the dedicated TTS thread.
+
+    The engine's event loop is started once in externally-driven mode and
+    pumped with iterate(); runAndWait() would spin the driver loop up and
+    down for every segment, which costs tens of ms per utterance on the
+    SAPI backend.
+    """
+    engine = None
+    while True:
+        segment = _tts_queue.get()
+        if segment is None:
+            break
+        try:
+            if engine is None:
+                engine = _get_tts_engine()
+                engine.startLoop(False)
+            engine.say(segment)
+            engine.iterate()
+            while engine.isBusy():
+                engine.iterate()
+                time.sleep(0.05)
+        except Exception as e:
+            logger.error(f"TTS Error: {e}")
+        finally:
+            _tts_queue.task_done()
+    if engine is not None:
+        try:
+            engine.endLoop()
+        except Exception:
+            pass
+
+
+def _ensure_tts_worker():
+    global _tts_thread
+    if _tts_thread is None:
+        _tts_thread = threading.Thread(target=_tts_worker, daemon=True)
+        _tts_thread.start()
+
+
+def _drain_tts_queue():
+    """Let queued speech finish before the interpreter tears down.
+
+    The worker is a daemon thread, so without this hook :quit or EOF
+    right after a voiced response would kill playback mid-sentence. The
+    None sentinel lands behind any queued segments, so the worker plays
+    them out and exits; the join is bounded so a wedged audio driver
+    cannot hang shutdown indefinitely.
+    """
+    if _tts_thread is None or not _tts_thread.is_alive():
+        return
+    try:
+        _tts_queue.put_nowait(None)
+    except queue.Full:
+        return
+    _tts_thread.join(timeout=30.0)
+
+
+atexit.register(_drain_tts_queue)
+
 
 def speak(text):
     """Convert text to speech, excluding emojis"""
     try:
-        # Remove emojis from text using regex
-        import re
-        emoji_pattern = re.compile(
-            "["
-            "\U0001F600-\U0001F64F"  # emoticons
-            "\U0001F300-\U0001F5FF"  # symbols & pictographs
-            "\U0001F680-\U0001F6FF"  # transport & map symbols
-            "\U0001F1E0-\U0001F1FF"  # flags (iOS)
-            "\U00002500-\U00002BEF"  # chinese char
-            "\U00002702-\U000027B0"
-            "\U00002702-\U000027B0"
-            "\U000024C2-\U0001F251"
-            "\U0001f926-\U0001f937"
-            "\U00010000-\U0010ffff"
-            "\u2640-\u2642"
-            "\u2600-\u2B55"
-            "\u200d"
-            "\u23cf"
-            "\u23e9"
-            "\u231a"
-            "\ufe0f\u200d"
-            "\u23cf"
-            "\u23e9"
-            "\u231a"
-            "\ufe0f\u200d"
-            "\u3030"
-            "]+", flags=re.UNICODE
-        )
-        clean_text = emoji_pattern.sub(r'', text)
-        
-        tts_engine.say(clean_text)
-        tts_engine.runAndWait()
+        # Pure-ASCII text (math/code answers) cannot contain emoji, so skip
+        # the multi-range regex scan entirely for it.
+        clean_text = text if text.isascii() else _EMOJI_RE.sub('', text)
+
+        # Enqueue sentence-by-sentence: audio starts after the first sentence
+        # and the REPL gets control back immediately.
+        _ensure_tts_worker()
+        for segment in _SENTENCE_SPLIT_RE.split(clean_text):
+            if segment.strip():
+                try:
+                    _tts_queue.put_nowait(segment)
+                except queue.Full:
+                    logger.debug("TTS queue full - dropping segment")
+                    break
     except Exception as e:
         logger.error(f"TTS Error: {e}")
 
-def _handle_profile_command(user_input: str, agent, force_simple_output: bool, console):
+# One precompiled pass tokenizes ":profile set key value" style commands
+# into (action, key, value); trailing groups come back None when absent.
+_CMD_RE = re.compile(
+    r'^:(?P<cmd>\w+)(?:\s+(?P<action>\w+)(?:\s+(?P<key>\S+)(?:\s+(?P<value>.+))?)?)?\s*$')
+
+
+def _handle_profile_command(user_input: str, agent):
     """Handle profile-related commands."""
-    context_manager = agent.tools.get('context_manager')
+    context_manager = agent.context_manager
     if not context_manager:
-        if force_simple_output:
-            print("Context manager not available")
-        else:
-            console.print("[red]Context manager not available[/red]")
+        emit("[red]Context manager not available[/red]")
         return
-        
-    parts = user_input.split(':', 2)
-    if len(parts) < 3:
-        if force_simple_output:
-            print("Usage: :profile set key value OR :profile get key OR :profile show")
-        else:
-            console.print("[yellow]Usage:[/yellow] :profile set key value OR :profile get key OR :profile show")
+
+    m = _CMD_RE.match(user_input)
+    action, key, value = m.group('action', 'key', 'value') if m else (None, None, None)
+    if action is None:
+        emit("[yellow]Usage:[/yellow] :profile set key value OR :profile get key OR :profile show")
         return
-        
-    action = parts[1].strip()
-    
+
+    action = action.lower()
+
     if action == "set":
-        key_value = parts[2].split(' ', 1)
-        if len(key_value) == 2:
-            key, value = key_value
-            result = context_manager.execute('set_profile', key=key.strip(), value=value.strip())
-            if force_simple_output:
-                print(f"Profile set: {key} = {value}")
-            else:
-                console.print(f"[green]Profile set:[/green] {key} = {value}")
+        if key and value:
+            result = context_manager.execute('set_profile', key=key, value=value.strip())
+            emit(f"[green]Profile set:[/green] {key} = {value}")
         else:
-            if force_simple_output:
-                print("Usage: :profile set key value")
-            else:
-                console.print("[yellow]Usage:[/yellow] :profile set key value")
+            emit("[yellow]Usage:[/yellow] :profile set key value")
     elif action == "get":
-        key = parts[2].strip()
+        if not key:
+            emit("[yellow]Usage:[/yellow] :profile get key")
+            return
         value = context_manager.execute('get_profile', key=key)
-        if force_simple_output:
-            print(f"{key}: {value}")
-        else:
-            console.print(f"[bold]{key}:[/bold] {value}")
+        emit(f"[bold]{key}:[/bold] {value}")
     elif action == "show":
         profile = context_manager.execute('get_profile')
+        # One render for the whole dump instead of a print-and-flush per
+        # entry; rich mode gets a proper two-column table.
         if force_simple_output:
-            print("User Profile:")
-            for key, value in profile.items():
-                print(f"  {key}: {value}")
+            lines = "\n".join(f"  [cyan]{k}:[/cyan] {v}" for k, v in profile.items())
+            emit(f"[bold]User Profile:[/bold]\n{lines}")
         else:
-            console.print("[bold]User Profile:[/bold]")
-            for key, value in profile.items():
-                console.print(f"  [cyan]{key}:[/cyan] {value}")
+            table = Table(title="User Profile", title_justify="left",
+                          show_header=False, box=None, padding=(0, 2))
+            for k, v in profile.items():
+                table.add_row(f"[cyan]{k}[/cyan]", str(v))
+            console.print(table)
 
-def _handle_topics_command(agent, force_simple_output: bool, console):
+def _handle_topics_command(agent):
     """Handle topics-related commands."""
-    context_manager = agent.tools.get('context_manager')
+    context_manager = agent.context_manager
     if not context_manager:
-        if force_simple_output:
-            print("Context manager not available")
-        else:
-            console.print("[red]Context manager not available[/red]")
+        emit("[red]Context manager not available[/red]")
         return
-        
+
     topics = context_manager.execute('get_topics')
-    if force_simple_output:
-        print("Important Topics:")
-        for i, topic in enumerate(topics, 1):
-            print(f"  {i}. {topic}")
-    else:
-        console.print("[bold]Important Topics:[/bold]")
-        for i, topic in enumerate(topics, 1):
-            console.print(f"  {i}. [green]{topic}[/green]")
+    # One joined render: a single write instead of 1 + len(topics).
+    body = "\n".join(f"  {i}. [green]{t}[/green]" for i, t in enumerate(topics, 1))
+    emit(f"[bold]Important Topics:[/bold]\n{body}")
 
-def _handle_preferences_command(user_input: str, agent, force_simple_output: bool, console):
+def _handle_preferences_command(user_input: str, agent):
     """Handle preferences-related commands."""
-    context_manager = agent.tools.get('context_manager')
+    context_manager = agent.context_manager
     if not context_manager:
-        if force_simple_output:
-            print("Context manager not available")
-        else:
-            console.print("[red]Context manager not available[/red]")
+        emit("[red]Context manager not available[/red]")
         return
-        
-    parts = user_input.split(':', 2)
-    if len(parts) < 3:
-        # Show all preferences
+
+    # Same precompiled tokenizer as :profile (":preferences set key value").
+    m = _CMD_RE.match(user_input)
+    action, key, value = m.group('action', 'key', 'value') if m else (None, None, None)
+    if action is None:
+        # Show all preferences in one joined render.
         preferences = context_manager.execute('get_preferences')
-        if force_simple_output:
-            print("Learning Preferences:")
-            for key, value in preferences.items():
-                if key != 'updated_at':
-                    print(f"  {key}: {value}")
-        else:
-            console.print("[bold]Learning Preferences:[/bold]")
-            for key, value in preferences.items():
-                if key != 'updated_at':
-                    console.print(f"  [cyan]{key}:[/cyan] {value}")
+        lines = "\n".join(f"  [cyan]{k}:[/cyan] {v}"
+                          for k, v in preferences.items() if k != 'updated_at')
+        emit(f"[bold]Learning Preferences:[/bold]\n{lines}")
         return
-        
-    action = parts[1].strip()
-    
+
+    action = action.lower()
+
     if action == "set":
-        key_value = parts[2].split(' ', 1)
-        if len(key_value) == 2:
-            key, value = key_value
-            result = context_manager.execute('set_preference', key=key.strip(), value=value.strip())
-            if force_simple_output:
-                print(f"Preference set: {key} = {value}")
-            else:
-                console.print(f"[green]Preference set:[/green] {key} = {value}")
+        if key and value:
+            result = context_manager.execute('set_preference', key=key, value=value.strip())
+            emit(f"[green]Preference set:[/green] {key} = {value}")
+        else:
+            emit("[yellow]Usage:[/yellow] :preferences set key value")
 
 def main():
     global voice_mode
+
+    # Construct the Agent in the background so tool registration overlaps
+    # the welcome render and the user's first keystrokes; the first turn
+    # joins the thread, which by then has usually finished.
+    agent_holder = {}
+    init_thread = threading.Thread(
+        target=lambda: agent_holder.setdefault('agent', Agent()), daemon=True)
+    init_thread.start()
     print_welcome()
-    agent = Agent()
-    
+    agent = None
+
+    def _show_tools():
+        emit(f"[bold]Available Tools:[/bold] {', '.join(agent.tools.keys())}")
+
+    # Keyed on the token after the leading colon; the lambdas pick up the
+    # (re)bound agent from the enclosing scope at call time.
+    colon_dispatch = {
+        "help": lambda _input: print_help(),
+        "tools": lambda _input: _show_tools(),
+        "profile": lambda _input: _handle_profile_command(_input, agent),
+        "topics": lambda _input: _handle_topics_command(agent),
+        "preferences": lambda _input: _handle_preferences_command(_input, agent),
+    }
+
+
     while True:
         try:
             if force_simple_output:
@@ -358,96 +495,94 @@ def main():
                     logger.info("EOF/Keyboard interrupt detected - exiting gracefully")
                     break
             
-            if not user_input.strip():
-                continue
-                
-            if user_input.lower() in [":quit", ":exit", "quit", "exit"]:
-                if force_simple_output:
-                    print("Goodbye!")
-                else:
-                    console.print("[bold blue]Goodbye![/bold blue]")
-                break
-                
-            if user_input.lower() == ":help":
-                print_help()
+            # Normalize once per iteration; every comparison below reuses
+            # these instead of re-allocating lowered/stripped copies.
+            user_input = user_input.strip()
+            if not user_input:
                 continue
-                
-            if user_input.lower() == ":tools":
-                tools_list = ", ".join(agent.tools.keys())
-                if force_simple_output:
-                    print(f"Available Tools: {tools_list}")
-                else:
-                    console.print(f"[bold]Available Tools:[/bold] {tools_list}")
-                continue
-            
-            if user_input.lower().startswith(":profile"):
-                _handle_profile_command(user_input, agent, force_simple_output, console)
-                continue
-                
-            if user_input.lower().startswith(":topics"):
-                _handle_topics_command(agent, force_simple_output, console)
-                continue
-                
-            if user_input.lower().startswith(":preferences"):
-                _handle_preferences_command(user_input, agent, force_simple_output, console)
-                continue
-            
-            if user_input.lower() in ["/voicemode", "enable voice mode", "disable voice mode", "voice mode on", "voice mode off"]:
-                if user_input.lower() in ["enable voice mode", "voice mode on"]:
-                    voice_mode = True
-                    status = "enabled"
-                elif user_input.lower() in ["disable voice mode", "voice mode off"]:
-                    voice_mode = False
-                    status = "disabled"
-                else:  # Toggle for "/voicemode"
-                    voice_mode = not voice_mode
+
+            lowered = user_input.lower()
+
+            if agent is None:
+                init_thread.join()
+                agent = agent_holder.get('agent')
+                if agent is None:
+                    # Background construction failed; retry inline so the
+                    # error surfaces through the normal handler below.
+                    agent = agent_holder['agent'] = Agent()
+
+            # Ordinary chat input — the overwhelmingly common case — skips
+            # the whole command block on this one gate; only colon/slash
+            # input and the fixed voice/exit phrases enter it.
+            if user_input[0] in ":/" or lowered in _EXIT_COMMANDS or lowered in _VOICE_ACTIONS:
+                if lowered in _EXIT_COMMANDS:
+                    emit("[bold blue]Goodbye![/bold blue]")
+                    break
+
+                if lowered[0] == ":" and len(lowered) > 1:
+                    head = lowered[1:].split(None, 1)[0].split(":", 1)[0]
+                    handler = colon_dispatch.get(head)
+                    if handler is not None:
+                        handler(user_input)
+                        continue
+
+                if lowered == "/voicemode" or lowered in _VOICE_ACTIONS:
+                    voice_mode = _VOICE_ACTIONS.get(lowered, not voice_mode)
                     status = "enabled" if voice_mode else "disabled"
-                
-                if force_simple_output:
-                    print(f"Voice mode {status}")
-                else:
-                    console.print(f"Voice mode [bold green]{status}[/bold green]" if voice_mode else f"Voice mode [bold red]{status}[/bold red]")
-                continue
+                    color = "green" if voice_mode else "red"
+                    emit(f"Voice mode [bold {color}]{status}[/bold {color}]")
+                    continue
+                # Unrecognized colon/slash input falls through to the agent.
 
             # Process input
             if force_simple_output:
                 print("Thinking...")
                 intent_data = agent.parse_intent(user_input)
-                response = agent.route_and_execute(intent_data)
+                response_text = "".join(agent.route_and_execute_stream(intent_data))
+                emit_panel(response_text)
             else:
-                with console.status("[bold yellow]Thinking...[/bold yellow]"):
+                # Fast turns (intent-cache hits, keyword fast path) finish
+                # well under the delay, so they never pay for starting the
+                # live renderer; the spinner only appears when parsing
+                # actually takes a while.
+                parse_done = [False]
+
+                def _spinner_start(done=parse_done):
+                    with _SPINNER_LOCK:
+                        if not done[0]:
+                            _THINKING_STATUS.start()
+
+                spinner_timer = threading.Timer(0.3, _spinner_start)
+                spinner_timer.start()
+                try:
                     intent_data = agent.parse_intent(user_input)
-                    response = agent.route_and_execute(intent_data)
-            
-            # Display response
-            response_text = str(response)
-            
-            if force_simple_output:
-                print("\n" + "=" * 50)
-                print("StudBotty:")
-                print("-" * 50)
-                print(response_text)
-                print("=" * 50 + "\n")
-            else:
-                # Escape response to prevent markup errors from brackets in content (e.g. Mermaid code)
-                console.print(Panel(escape(response_text), title="StudBotty", border_style="green"))
+                finally:
+                    spinner_timer.cancel()
+                    with _SPINNER_LOCK:
+                        parse_done[0] = True
+                        _THINKING_STATUS.stop()
+                # Stream the response into a live panel so the first chunks
+                # are visible while the model is still generating; the final
+                # panel stays on screen when the Live block exits.
+                buf = []
+                with Live(Panel("", title="StudBotty", border_style="green"),
+                          console=console, refresh_per_second=10) as live:
+                    for chunk in agent.route_and_execute_stream(intent_data):
+                        buf.append(chunk)
+                        live.update(Panel(Text("".join(buf)),
+                                          title="StudBotty", border_style="green"))
+                response_text = "".join(buf)
             
             # Speak response if voice mode is enabled
             if voice_mode:
                 speak(response_text)
             
         except KeyboardInterrupt:
-            if force_simple_output:
-                print("\nGoodbye!")
-            else:
-                console.print("\n[bold blue]Goodbye![/bold blue]")
+            emit("\n[bold blue]Goodbye![/bold blue]")
             break
         except Exception as e:
             logger.exception("An error occurred")
-            if force_simple_output:
-                print(f"Error: {e}")
-            else:
-                console.print(f"[bold red]Error:[/bold red] {e}")
+            emit(f"[bold red]Error:[/bold red] {e}")
     
 
 
@@ -8,3 +8,23 @@ from .persist import PersistTool
 from .chat import ChatTool
 from .tts import TTSTool
 from .context_manager import ContextManagerTool
+from .recall import RecallTool
+from .summary import SummaryTool
+
+# Static registry used by Agent: instantiating these is much cheaper than
+# walking the package directory and re-importing modules on every Agent()
+# construction. PersistTool is intentionally absent — it is an internal
+# helper, not a user-facing tool (discovery skipped persist.py too).
+REGISTERED_TOOL_CLASSES = (
+    QuizTool,
+    MathTool,
+    VizTool,
+    SearchTool,
+    FilesTool,
+    AnkiTool,
+    ChatTool,
+    TTSTool,
+    ContextManagerTool,
+    RecallTool,
+    SummaryTool,
+)
@@ -0,0 +1,106 @@
+"""Shared JSON helpers for the persistence-facing tools.
+
+orjson serializes and parses the dict payloads these tools move around
+several times faster than the stdlib; it also emits bytes directly, so
+callers read and write their files in binary mode. When orjson is not
+installed the helpers fall back to the stdlib transparently.
+"""
+from typing import Any
+
+try:
+    import orjson
+
+    def dumps(obj: Any, *, indent: bool = True) -> bytes:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(obj, option=option, default=str)
+
+    loads = orjson.loads
+except ImportError:
+    import json
+
+    def dumps(obj: Any, *, indent: bool = True) -> bytes:
+        return json.dumps(obj, indent=2 if indent else None, default=str).encode()
+
+    def loads(data: Any) -> Any:
+        # orjson parses any bytes-like buffer; mirror that for callers
+        # that hand in a memoryview over an mmap.
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+
+class JsonArrayScanner:
+    """Incremental companion to :func:`find_json_array` for streamed text.
+
+    ``feed`` consumes successive chunks and returns True as soon as the
+    first balanced array has closed, so a caller pulling tokens from a
+    stream can stop early instead of waiting out trailing prose.
+    """
+
+    def __init__(self):
+        self._started = False
+        self._depth = 0
+        self._in_str = False
+        self._esc = False
+        self.done = False
+
+    def feed(self, piece: str) -> bool:
+        if self.done:
+            return True
+        for c in piece:
+            if not self._started:
+                if c == '[':
+                    self._started = True
+                    self._depth = 1
+                continue
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif c == '\\':
+                    self._esc = True
+                elif c == '"':
+                    self._in_str = False
+            elif c == '"':
+                self._in_str = True
+            elif c == '[':
+                self._depth += 1
+            elif c == ']':
+                self._depth -= 1
+                if self._depth == 0:
+                    self.done = True
+                    return True
+        return False
+
+
+def find_json_array(s: str) -> str:
+    """Return the first balanced ``[...]`` slice of s, or None.
+
+    A single counting pass for pulling a JSON array out of LLM output —
+    unlike a greedy DOTALL regex it cannot backtrack and stops at the
+    first balanced array. Brackets inside JSON strings (including
+    escaped quotes) are ignored.
+    """
+    start = s.find('[')
+    if start < 0:
+        return None
+    depth = 0
+    in_str = False
+    esc = False
+    for i in range(start, len(s)):
+        c = s[i]
+        if in_str:
+            if esc:
+                esc = False
+            elif c == '\\':
+                esc = True
+            elif c == '"':
+                in_str = False
+        elif c == '"':
+            in_str = True
+        elif c == '[':
+            depth += 1
+        elif c == ']':
+            depth -= 1
+            if depth == 0:
+                return s[start:i + 1]
+    return None
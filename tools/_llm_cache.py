@@ -0,0 +1,232 @@
+"""Semantic response cache for LLM-backed tools.
+
+An ``ollama.chat`` round trip dominates every other cost in the app by
+orders of magnitude. This cache short-circuits it two ways: an exact
+sha256 match on the message plus context, and a semantic match that
+embeds the message (``ollama.embeddings``) and compares it against the
+stored queries by cosine similarity. Entries carry a timestamp for TTL
+expiry and the store is trimmed oldest-first past a fixed size.
+
+Embeddings fall back gracefully: if ollama or the embedding model is
+unavailable the semantic path quietly misses and only the exact path
+remains active.
+"""
+import hashlib
+import os
+import threading
+import time
+from typing import Any, List, Optional
+
+from tools._jsonutil import dumps as _json_dumps, loads as _json_loads
+from config import config
+
+try:
+    import numpy as _np
+except ImportError:
+    _np = None
+
+_EMBED_MODEL = 'nomic-embed-text'
+_MAX_ENTRIES = 500
+_TTL_SECONDS = 24 * 3600
+_SIMILARITY_THRESHOLD = 0.92
+
+
+def exact_key(*parts: str) -> str:
+    """Stable sha256 key over any number of string parts."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode())
+        h.update(b'\x00')
+    return h.hexdigest()
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    if _np is not None:
+        a = _np.asarray(a)
+        b = _np.asarray(b)
+        denom = float(_np.linalg.norm(a) * _np.linalg.norm(b))
+        return float(a @ b) / denom if denom else 0.0
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = sum(x * x for x in a) ** 0.5
+    norm_b = sum(y * y for y in b) ** 0.5
+    return dot / (norm_a * norm_b) if norm_a and norm_b else 0.0
+
+
+# The cache has its own file rather than a key in the shared persistence
+# store: embedding vectors dominate its size, and routing it through
+# PersistTool rewrote the whole user-data file — and bumped the mtime the
+# enhanced-prompt memo keys on — after nearly every model call. The load
+# is mtime-guarded like PersistTool's, so repeat reads stay in memory.
+_STORE_LOCK = threading.Lock()
+_STORE: Optional[List[dict]] = None
+_STORE_MTIME_NS = 0
+
+
+def _load_entries() -> List[dict]:
+    global _STORE, _STORE_MTIME_NS
+    try:
+        mtime_ns = os.stat(config.SEMANTIC_CACHE_FILE).st_mtime_ns
+    except OSError:
+        if _STORE is None:
+            _STORE = []
+        _STORE_MTIME_NS = 0
+        return _STORE
+
+    if _STORE is not None and mtime_ns == _STORE_MTIME_NS:
+        return _STORE
+
+    try:
+        with open(config.SEMANTIC_CACHE_FILE, 'rb') as f:
+            loaded = _json_loads(f.read())
+        _STORE = loaded if isinstance(loaded, list) else []
+    except Exception:
+        _STORE = []
+    _STORE_MTIME_NS = mtime_ns
+    return _STORE
+
+
+def _save_entries(entries: List[dict]) -> None:
+    global _STORE, _STORE_MTIME_NS
+    _STORE = entries
+    with open(config.SEMANTIC_CACHE_FILE, 'wb') as f:
+        f.write(_json_dumps(entries, indent=False))
+    # Re-stamp so our own write is not mistaken for an external change.
+    try:
+        _STORE_MTIME_NS = os.stat(config.SEMANTIC_CACHE_FILE).st_mtime_ns
+    except OSError:
+        pass
+
+
+class SemanticCache:
+    def __init__(self):
+        # Embedding computed by the last get(); put() reuses it so a
+        # miss-then-store cycle embeds the message only once.
+        self._last_embedded: Optional[str] = None
+        self._last_embedding: Optional[List[float]] = None
+
+    def _entries(self) -> List[dict]:
+        with _STORE_LOCK:
+            entries = _load_entries()
+        cutoff = time.time() - _TTL_SECONDS
+        return [e for e in entries if e.get('ts', 0) >= cutoff]
+
+    def _embed(self, text: str) -> Optional[List[float]]:
+        if text == self._last_embedded:
+            return self._last_embedding
+        try:
+            import ollama
+            embedding = ollama.embeddings(model=_EMBED_MODEL, prompt=text).get('embedding')
+        except Exception:
+            embedding = None
+        self._last_embedded = text
+        self._last_embedding = embedding
+        return embedding
+
+    def get(self, message: str, context_hash: str) -> Optional[str]:
+        """Return a cached response for the message, or None.
+
+        Tries the exact sha256 key first (dict-lookup cheap), then a
+        cosine comparison of the message embedding against stored
+        queries that share the same context hash.
+        """
+        entries = self._entries()
+        if not entries:
+            return None
+
+        key = exact_key(message, context_hash)
+        for entry in entries:
+            if entry.get('key') == key:
+                return entry.get('response')
+
+        embedding = self._embed(message)
+        if embedding is None:
+            return None
+
+        candidates = [e for e in entries
+                      if e.get('ctx') == context_hash and e.get('emb')]
+        if not candidates:
+            return None
+
+        if _np is not None:
+            # One (N, D) @ (D,) gemv instead of N Python-level dot
+            # products — BLAS covers the whole store in a single pass.
+            matrix = _np.asarray([e['emb'] for e in candidates], dtype=_np.float32)
+            query = _np.asarray(embedding, dtype=_np.float32)
+            denom = _np.linalg.norm(matrix, axis=1) * _np.linalg.norm(query)
+            denom[denom == 0] = 1.0
+            scores = (matrix @ query) / denom
+            idx = int(scores.argmax())
+            if scores[idx] > _SIMILARITY_THRESHOLD:
+                return candidates[idx].get('response')
+            return None
+
+        best_score = 0.0
+        best_response = None
+        for entry in candidates:
+            score = _cosine(embedding, entry['emb'])
+            if score > best_score:
+                best_score = score
+                best_response = entry.get('response')
+
+        if best_score > _SIMILARITY_THRESHOLD:
+            return best_response
+        return None
+
+    def put(self, message: str, context_hash: str, response: str) -> None:
+        """Store a response, evicting oldest entries past the size cap."""
+        entries = self._entries()
+        entries.append({
+            'key': exact_key(message, context_hash),
+            'ctx': context_hash,
+            'emb': self._embed(message),
+            'response': response,
+            'ts': time.time(),
+        })
+        if len(entries) > _MAX_ENTRIES:
+            entries = entries[-_MAX_ENTRIES:]
+        with _STORE_LOCK:
+            _save_entries(entries)
+
+
+# Shared instance for the single-prompt tools (quiz, recall, summary);
+# ChatTool keeps its own conversation-aware wiring.
+_SHARED_CACHE = SemanticCache()
+
+
+def chat_cached(model: str, prompt: str, *key_extras: str,
+                stream_until_array: bool = False) -> str:
+    """One-shot ollama.chat through the semantic cache.
+
+    ``key_extras`` (tool name, level, count, ...) partition the cache so
+    e.g. an easy and a hard quiz on the same topic never collide. Import
+    and network errors propagate for the caller's own error handling.
+
+    With ``stream_until_array`` the response is pulled token by token
+    and the pull stops as soon as the first balanced JSON array closes —
+    breaking out of the stream cancels the generation server-side, so
+    trailing prose after the array is never paid for.
+    """
+    context_hash = exact_key(model, *key_extras)
+    cached = _SHARED_CACHE.get(prompt, context_hash)
+    if cached is not None:
+        return cached
+
+    import ollama
+    messages = [{'role': 'user', 'content': prompt}]
+    if stream_until_array:
+        from tools._jsonutil import JsonArrayScanner
+        scanner = JsonArrayScanner()
+        parts = []
+        for chunk in ollama.chat(model=model, messages=messages, stream=True):
+            piece = chunk['message']['content']
+            if not piece:
+                continue
+            parts.append(piece)
+            if scanner.feed(piece):
+                break
+        result = ''.join(parts)
+    else:
+        response = ollama.chat(model=model, messages=messages)
+        result = response['message']['content']
+    _SHARED_CACHE.put(prompt, context_hash, result)
+    return result
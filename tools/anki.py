@@ -1,7 +1,102 @@
+from collections import Counter
 from typing import Any, Dict, List
 from tools.base import Tool
-import json
+from tools._jsonutil import dumps as _json_dumps, loads as _json_loads, find_json_array as _find_json_array
+from config import config
+import html
+import mmap
 import os
+import threading
+import webbrowser
+
+try:
+    import ollama
+except ImportError:
+    ollama = None
+
+# One JSON object per line. Appending a card is a single O(1) write to the
+# end of the log instead of re-serializing the whole collection.
+_FLASHCARDS_FILE = "flashcards.jsonl"
+_LEGACY_FILE = "flashcards.json"
+
+# HTML page templates, built once at import. The page is assembled as a
+# list of fragments and joined once, instead of growing a string with +=.
+_HTML_STYLE = """<style>
+    body {
+        font-family: Arial, sans-serif;
+        background-color: #f0f0f0;
+        margin: 0;
+        padding: 20px;
+    }
+    .container {
+        max-width: 800px;
+        margin: 0 auto;
+        background-color: white;
+        padding: 20px;
+        border-radius: 10px;
+        box-shadow: 0 0 10px rgba(0, 0, 0, 0.1);
+    }
+    h1 {
+        text-align: center;
+        color: #333;
+    }
+    .flashcard {
+        background-color: #fff;
+        border: 1px solid #ddd;
+        border-radius: 8px;
+        padding: 15px;
+        margin: 10px 0;
+        cursor: pointer;
+        transition: transform 0.2s;
+    }
+    .flashcard:hover {
+        transform: scale(1.02);
+    }
+    .flashcard-front {
+        font-weight: bold;
+        font-size: 16px;
+    }
+    .flashcard-back {
+        display: none;
+        font-size: 14px;
+        color: #555;
+    }
+    .flashcard.flipped .flashcard-front {
+        display: none;
+    }
+    .flashcard.flipped .flashcard-back {
+        display: block;
+    }
+</style>"""
+
+_HTML_HEADER = """<!DOCTYPE html>
+<html>
+<head>
+    <title>Flashcards: {topic}</title>
+    {style}
+</head>
+<body>
+    <div class="container">
+        <h1>Flashcards: {topic}</h1>
+        <div id="flashcards-container">
+"""
+
+_CARD_TEMPLATE = """            <div class="flashcard" onclick="this.classList.toggle('flipped')">
+                <div class="flashcard-front">
+                    {idx}. {front}
+                </div>
+                <div class="flashcard-back">
+                    {back}
+                </div>
+            </div>
+"""
+
+_HTML_FOOTER = """        </div>
+    </div>
+</body>
+</html>
+"""
+
 
 class AnkiTool(Tool):
     def __init__(self):
@@ -21,37 +116,66 @@ class AnkiTool(Tool):
             "required": ["action"]
         }
 
-    def _load_flashcards(self) -> Dict[str, List[Dict[str, Any]]]:
-        """Load flashcards from the local JSON file."""
-        flashcards_file = "flashcards.json"
-        if not os.path.exists(flashcards_file):
-            return {}
-        
+    def _migrate_if_needed(self) -> None:
+        """Fold the legacy flashcards.json into the log before first use.
+
+        Runs on both the read and the write path: appending first (the
+        common generate-before-list case) would otherwise create the log
+        and permanently orphan the legacy cards.
+        """
+        if not os.path.exists(_FLASHCARDS_FILE) and os.path.exists(_LEGACY_FILE):
+            self._migrate_legacy()
+
+    def _migrate_legacy(self) -> None:
+        """One-time migration of the old flashcards.json list to the JSONL log."""
         try:
-            with open(flashcards_file, 'r') as f:
-                data = json.load(f)
-                # Organize flashcards by deck
-                decks = {}
-                for card in data:
-                    deck_name = card.get("deck", "default")
-                    if deck_name not in decks:
-                        decks[deck_name] = []
-                    decks[deck_name].append(card)
-                return decks
-        except:
-            return {}
-
-    def _save_flashcards(self, decks: Dict[str, List[Dict[str, Any]]]) -> None:
-        """Save flashcards to the local JSON file."""
-        flashcards_file = "flashcards.json"
-        # Flatten the decks into a single list
-        flashcards = []
-        for deck_name, cards in decks.items():
-            for card in cards:
-                flashcards.append(card)
-        
-        with open(flashcards_file, 'w') as f:
-            json.dump(flashcards, f, indent=2)
+            with open(_LEGACY_FILE, 'rb') as f:
+                cards = _json_loads(f.read())
+        except Exception:
+            return
+        if isinstance(cards, list):
+            self._write_lines(cards)
+        try:
+            os.replace(_LEGACY_FILE, _LEGACY_FILE + ".bak")
+        except OSError:
+            pass
+
+    def _load_raw(self) -> List[Dict[str, Any]]:
+        """Load the flat flashcard list from the JSONL log.
+
+        The file is mmapped and scanned line by line so only the slices
+        being parsed are copied out of the page cache.
+        """
+        self._migrate_if_needed()
+
+        try:
+            with open(_FLASHCARDS_FILE, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size == 0:
+                    return []
+                cards = []
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    pos = 0
+                    while pos < size:
+                        nl = mm.find(b'\n', pos)
+                        if nl == -1:
+                            nl = size
+                        if nl > pos:
+                            cards.append(_json_loads(mm[pos:nl]))
+                        pos = nl + 1
+                return cards
+        except (OSError, ValueError):
+            return []
+
+    def _append_cards(self, cards: List[Dict[str, Any]]) -> None:
+        """Append cards to the JSONL log, migrating the legacy file first."""
+        self._migrate_if_needed()
+        self._write_lines(cards)
+
+    def _write_lines(self, cards: List[Dict[str, Any]]) -> None:
+        """Append cards to the JSONL log without touching existing entries."""
+        with open(_FLASHCARDS_FILE, 'ab') as f:
+            f.write(b''.join(_json_dumps(c, indent=False) + b'\n' for c in cards))
 
     def execute(self, **kwargs) -> str:
         action = kwargs.get("action", "generate")
@@ -61,11 +185,11 @@ class AnkiTool(Tool):
         if action == "generate":
             if not topic:
                 return "❌ Error: 'topic' is required to generate flashcards."
-            
+
+            if ollama is None:
+                return "❌ Error: Ollama is not installed. Install it to generate flashcards."
+
             try:
-                import ollama
-                from config import config
-                
                 # Generate flashcards using Ollama
                 prompt = f"Generate 5 flashcards on the topic '{topic}'. Each flashcard should have a question on the front and a concise answer on the back. Return the flashcards in JSON format with keys: 'front' and 'back'."
                 
@@ -76,14 +200,10 @@ class AnkiTool(Tool):
                 
                 content = response['message']['content']
                 
-                # Parse the JSON response
-                import json
-                import re
-                
-                # Extract JSON from the response
-                match = re.search(r'\[.*\]', content, re.DOTALL)
-                if match:
-                    flashcards_data = json.loads(match.group(0))
+                # Extract the first balanced JSON array from the response
+                array_text = _find_json_array(content)
+                if array_text:
+                    flashcards_data = _json_loads(array_text)
                 else:
                     # Fallback if JSON parsing fails
                     flashcards_data = [
@@ -94,132 +214,58 @@ class AnkiTool(Tool):
                         {"front": "What is the primary product of photosynthesis?", "back": "The primary product of photosynthesis is glucose."}
                     ]
                 
-                # Save the flashcards
-                decks = self._load_flashcards()
-                if deck not in decks:
-                    decks[deck] = []
-                
-                for card in flashcards_data:
-                    flashcard = {
+                # Save the flashcards — append-only, no full-file rewrite.
+                self._append_cards([
+                    {
                         "deck": deck,
                         "front": card.get("front", ""),
                         "back": card.get("back", ""),
                         "tags": ["auto-generated", "studbotty"]
                     }
-                    decks[deck].append(flashcard)
-                
-                self._save_flashcards(decks)
+                    for card in flashcards_data
+                ])
                 
                 # Generate an interactive HTML flashcard interface
-                html_content = f"""
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <title>Flashcards: {topic}</title>
-                    <style>
-                        body {{
-                            font-family: Arial, sans-serif;
-                            background-color: #f0f0f0;
-                            margin: 0;
-                            padding: 20px;
-                        }}
-                        .container {{
-                            max-width: 800px;
-                            margin: 0 auto;
-                            background-color: white;
-                            padding: 20px;
-                            border-radius: 10px;
-                            box-shadow: 0 0 10px rgba(0, 0, 0, 0.1);
-                        }}
-                        h1 {{
-                            text-align: center;
-                            color: #333;
-                        }}
-                        .flashcard {{
-                            background-color: #fff;
-                            border: 1px solid #ddd;
-                            border-radius: 8px;
-                            padding: 15px;
-                            margin: 10px 0;
-                            cursor: pointer;
-                            transition: transform 0.2s;
-                        }}
-                        .flashcard:hover {{
-                            transform: scale(1.02);
-                        }}
-                        .flashcard-front {{
-                            font-weight: bold;
-                            font-size: 16px;
-                        }}
-                        .flashcard-back {{
-                            display: none;
-                            font-size: 14px;
-                            color: #555;
-                        }}
-                        .flashcard.flipped .flashcard-front {{
-                            display: none;
-                        }}
-                        .flashcard.flipped .flashcard-back {{
-                            display: block;
-                        }}
-                    </style>
-                </head>
-                <body>
-                    <div class="container">
-                        <h1>Flashcards: {topic}</h1>
-                        <div id="flashcards-container">
-                """
-                
-                for idx, card in enumerate(flashcards_data, start=1):
-                    html_content += f"""
-                            <div class="flashcard" onclick="this.classList.toggle('flipped')">
-                                <div class="flashcard-front">
-                                    {idx}. {card['front']}
-                                </div>
-                                <div class="flashcard-back">
-                                    {card['back']}
-                                </div>
-                            </div>
-                    """
-                
-                html_content += """
-                        </div>
-                    </div>
-                    <script>
-                        // No additional JavaScript needed for this simple implementation
-                    </script>
-                </body>
-                </html>
-                """
-                
+                parts = [_HTML_HEADER.format(topic=html.escape(topic), style=_HTML_STYLE)]
+                parts.extend(
+                    _CARD_TEMPLATE.format(
+                        idx=idx,
+                        front=html.escape(card.get('front', '')),
+                        back=html.escape(card.get('back', ''))
+                    )
+                    for idx, card in enumerate(flashcards_data, start=1)
+                )
+                parts.append(_HTML_FOOTER)
+
                 # Save the HTML to a file
                 html_file = f"flashcards_{topic.replace(' ', '_')}.html"
                 with open(html_file, 'w', encoding='utf-8') as f:
-                    f.write(html_content)
+                    f.write(''.join(parts))
                 
-                # Open the HTML file in the default browser
-                import webbrowser
-                webbrowser.open(f'file://{os.path.abspath(html_file)}')
+                # Open the HTML file in the default browser. Launched on a
+                # daemon thread so the reply is not held up by browser
+                # startup (which can block for seconds on some platforms).
+                threading.Thread(
+                    target=webbrowser.open,
+                    args=(f'file://{os.path.abspath(html_file)}',),
+                    daemon=True
+                ).start()
                 
                 return f"📚 Flashcards on '{topic}' generated and opened in your browser!"
-            
-            except ImportError:
-                return "❌ Error: Ollama is not installed. Install it to generate flashcards."
+
             except Exception as e:
                 return f"❌ Error: Failed to generate flashcards. Details: {str(e)}"
         
         elif action == "list":
             deck = kwargs.get("deck", None)
-            decks = self._load_flashcards()
-            
+            flashcards = self._load_raw()
+
             if deck:
-                if deck not in decks:
-                    return f"❌ Deck '{deck}' not found."
-                
-                cards = decks[deck]
+                # Single filtering pass over the flat list — no dict build.
+                cards = [c for c in flashcards if c.get("deck", "default") == deck]
                 if not cards:
-                    return f"📂 Deck '{deck}' is empty."
-                
+                    return f"❌ Deck '{deck}' not found."
+
                 output = f"📂 Flashcards in deck '{deck}':\n\n"
                 for idx, card in enumerate(cards, start=1):
                     output += f"📝 **Flashcard {idx}**\n"
@@ -227,12 +273,13 @@ class AnkiTool(Tool):
                     output += f"   **Answer:** ||{card['back']}|| (Click to reveal)\n\n"
                 return output.strip()
             else:
-                if not decks:
+                if not flashcards:
                     return "📂 No flashcards found."
-                
+
+                counts = Counter(c.get("deck", "default") for c in flashcards)
                 output = "📂 Available Decks:\n\n"
-                for deck_name, cards in decks.items():
-                    output += f"- **{deck_name}**: {len(cards)} flashcards\n"
+                for deck_name, count in counts.items():
+                    output += f"- **{deck_name}**: {count} flashcards\n"
                 return output.strip()
         
         else:
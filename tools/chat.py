@@ -1,6 +1,61 @@
-from typing import Dict, Any, List
+import re
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List
 from tools.base import Tool
 from tools.context_manager import ContextManagerTool
+from tools._llm_cache import SemanticCache, exact_key
+from config import config
+
+try:
+    import ollama
+except ImportError:
+    ollama = None
+
+# Compiled once: topic extraction runs on every chat turn. The indicator
+# keywords and the study-request patterns are each folded into a single
+# alternation so one search pass replaces the per-pattern loops.
+_INDICATOR_RE = re.compile(
+    r"\b(?:explain|understand|learn about|study|concept of|what is|how does"
+    r"|why does|definition of|theory of|principle of|process of|method of"
+    r"|technique of)\b\s*(.+)")
+_STRIP_LEAD_RE = re.compile(r'^(?:the|a|an|to|how|why|what)\s+')
+_STRIP_PUNCT_RE = re.compile(r'[^\w\s]')
+_STUDY_RE = re.compile(r'(?:quiz me on|test me on|flashcards for|study|review)\s+(.+)')
+
+_DEFAULT_SYSTEM_PROMPT = """You are StudBotty, a friendly AI study companion. Your role is to:
+- Explain concepts clearly and concisely
+- Answer questions about any subject
+- Help students learn and understand topics
+- Use examples and analogies when helpful
+- Keep responses brief but informative (2-3 paragraphs max)
+- Maintain conversation context and refer back to previous topics when relevant
+
+Be encouraging and educational in your responses."""
+
+# Shared across calls: repeated or near-duplicate questions skip the
+# model entirely. Only consulted for context-free turns — a follow-up
+# like "what about that?" depends on history a cached answer ignores.
+_RESPONSE_CACHE = SemanticCache()
+
+# Exact-match LRU over the full conversation prefix: identical replays
+# (tests, re-asked questions mid-session) become a dict lookup. Keeping
+# the model's own prompt cache warm is handled via options below.
+_EXACT_CACHE: "OrderedDict[str, str]" = OrderedDict()
+_EXACT_CACHE_MAX = 256
+
+# num_keep=-1 tells ollama to retain the whole processed prompt in its
+# KV cache, so each turn only pays for the newly appended messages.
+_OLLAMA_OPTIONS = {'num_keep': -1}
+
+# Topic extraction overlaps with the in-flight model call; one worker is
+# enough since the LLM round trip dwarfs the regex + persistence work.
+_TOPIC_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix='chat-topics')
+
+
+def _conversation_key(model: str, messages: List[Dict[str, str]]) -> str:
+    return exact_key(model, *(f"{m['role']}:{m['content']}" for m in messages))
+
 
 class ChatTool(Tool):
     def __init__(self):
@@ -16,103 +71,155 @@ class ChatTool(Tool):
             "required": ["message"]
         }
 
-    def execute(self, message: str, conversation_context: List[Dict[str, str]] = None, use_enhanced_context: bool = True) -> str:
-        """Use Ollama to answer general questions with enhanced conversation context."""
-        
-        # Initialize context manager
-        context_manager = ContextManagerTool()
-        
-        # Generate enhanced system prompt if requested
+    def _build_messages(self, message: str, conversation_context: List[Dict[str, str]],
+                        use_enhanced_context: bool, context_manager: ContextManagerTool) -> List[Dict[str, str]]:
+        """Assemble the system prompt, history and current message for Ollama."""
         if use_enhanced_context:
             system_prompt = context_manager.generate_enhanced_system_prompt()
         else:
-            # Create a helpful AI assistant prompt
-            system_prompt = """You are StudBotty, a friendly AI study companion. Your role is to:
-- Explain concepts clearly and concisely
-- Answer questions about any subject
-- Help students learn and understand topics
-- Use examples and analogies when helpful
-- Keep responses brief but informative (2-3 paragraphs max)
-- Maintain conversation context and refer back to previous topics when relevant
+            system_prompt = _DEFAULT_SYSTEM_PROMPT
 
-Be encouraging and educational in your responses."""
+        messages = [{'role': 'system', 'content': system_prompt}]
+        if conversation_context:
+            messages.extend(conversation_context)
+        messages.append({'role': 'user', 'content': message})
+        return messages
+
+    def execute(self, message: str, conversation_context: List[Dict[str, str]] = None, use_enhanced_context: bool = True) -> str:
+        """Use Ollama to answer general questions with enhanced conversation context."""
+
+        if ollama is None:
+            return "❌ Ollama is not installed. Please install it to use chat features."
+
+        # Initialize context manager
+        context_manager = ContextManagerTool()
 
-        user_prompt = message
-         
         try:
-            import ollama
-            from config import config
-            
-            # Build conversation context
-            messages = [
-                {'role': 'system', 'content': system_prompt}
-            ]
-            
-            # Add conversation history if provided
-            if conversation_context:
-                messages.extend(conversation_context)
-            
-            # Add current user message
-            messages.append({'role': 'user', 'content': user_prompt})
-            
+            messages = self._build_messages(message, conversation_context,
+                                            use_enhanced_context, context_manager)
+
+            conv_key = _conversation_key(config.OLLAMA_MODEL, messages)
+            cached = _EXACT_CACHE.get(conv_key)
+            if cached is not None:
+                _EXACT_CACHE.move_to_end(conv_key)
+                return cached
+
+            context_hash = None
+            if not conversation_context:
+                context_hash = exact_key(config.OLLAMA_MODEL, messages[0]['content'])
+                cached = _RESPONSE_CACHE.get(message, context_hash)
+                if cached is not None:
+                    return cached
+
+            # Kick topic extraction off before the chat call so it runs
+            # under the model's multi-second latency instead of after it.
+            topic_future = None
+            if use_enhanced_context and message:
+                topic_future = _TOPIC_EXECUTOR.submit(
+                    self._store_topics, message, context_manager)
+
             response = ollama.chat(
                 model=config.OLLAMA_MODEL,
-                messages=messages
+                messages=messages,
+                options=_OLLAMA_OPTIONS
             )
-            
-            # Extract important topics from the conversation if enhanced context is enabled
-            if use_enhanced_context and message:
-                self._extract_and_store_topics(message, context_manager)
-            
-            return response['message']['content'].strip()
-            
-        except ImportError:
-            return "❌ Ollama is not installed. Please install it to use chat features."
+
+            result = response['message']['content'].strip()
+            _EXACT_CACHE[conv_key] = result
+            if len(_EXACT_CACHE) > _EXACT_CACHE_MAX:
+                _EXACT_CACHE.popitem(last=False)
+
+            if topic_future is not None:
+                topic_future.result()
+            if context_hash is not None:
+                _RESPONSE_CACHE.put(message, context_hash, result)
+
+            return result
+
         except Exception as e:
             return f"❌ Sorry, I encountered an error: {str(e)}"
+
+    def execute_stream(self, message: str, conversation_context: List[Dict[str, str]] = None,
+                       use_enhanced_context: bool = True) -> Iterator[str]:
+        """Yield the chat response incrementally as the model generates it."""
+        if ollama is None:
+            yield "❌ Ollama is not installed. Please install it to use chat features."
+            return
+
+        context_manager = ContextManagerTool()
+
+        try:
+            messages = self._build_messages(message, conversation_context,
+                                            use_enhanced_context, context_manager)
+
+            conv_key = _conversation_key(config.OLLAMA_MODEL, messages)
+            cached = _EXACT_CACHE.get(conv_key)
+            if cached is not None:
+                _EXACT_CACHE.move_to_end(conv_key)
+                yield cached
+                return
+
+            # Same cache policy as execute(): context-free turns can reuse
+            # a stored answer. A hit comes back as one chunk — there is
+            # nothing to stream when the model is never called.
+            context_hash = None
+            if not conversation_context:
+                context_hash = exact_key(config.OLLAMA_MODEL, messages[0]['content'])
+                cached = _RESPONSE_CACHE.get(message, context_hash)
+                if cached is not None:
+                    yield cached
+                    return
+
+            stream = ollama.chat(
+                model=config.OLLAMA_MODEL,
+                messages=messages,
+                stream=True,
+                options=_OLLAMA_OPTIONS
+            )
+            parts = []
+            for chunk in stream:
+                piece = chunk['message']['content']
+                if piece:
+                    parts.append(piece)
+                    yield piece
+
+            result = ''.join(parts).strip()
+            _EXACT_CACHE[conv_key] = result
+            if len(_EXACT_CACHE) > _EXACT_CACHE_MAX:
+                _EXACT_CACHE.popitem(last=False)
+            if context_hash is not None:
+                _RESPONSE_CACHE.put(message, context_hash, result)
+
+            if use_enhanced_context and message:
+                self._store_topics(message, context_manager)
+
+        except Exception as e:
+            yield f"❌ Sorry, I encountered an error: {str(e)}"
     
+    def _store_topics(self, message: str, context_manager: ContextManagerTool):
+        """Worker-thread entry: extract topics inside one write batch."""
+        with context_manager.persist_tool.batch():
+            self._extract_and_store_topics(message, context_manager)
+
     def _extract_and_store_topics(self, message: str, context_manager: ContextManagerTool):
         """Extract potential topics from user message and store important ones."""
-        import re
-        
-        # Common educational/academic keywords that indicate important topics
-        topic_indicators = [
-            'explain', 'understand', 'learn about', 'study', 'concept of',
-            'what is', 'how does', 'why does', 'definition of', 'theory of',
-            'principle of', 'process of', 'method of', 'technique of'
-        ]
-        
-        message_lower = message.lower()
-        
-        # Check if message contains topic indicators
-        for indicator in topic_indicators:
-            if indicator in message_lower:
-                # Extract potential topic after the indicator
-                parts = message_lower.split(indicator, 1)
-                if len(parts) > 1:
-                    potential_topic = parts[1].strip()
-                    # Clean up the topic (remove common words, punctuation)
-                    potential_topic = re.sub(r'^(the|a|an|to|how|why|what)\s+', '', potential_topic)
-                    potential_topic = re.sub(r'[^\w\s]', '', potential_topic).strip()
-                    
-                    # Only store if it's a meaningful topic (2+ words, not just 'is' etc.)
-                    if len(potential_topic.split()) >= 2 and potential_topic not in ['is', 'are', 'do', 'does']:
-                        context_manager.execute('add_topic', topic=potential_topic)
-                        break
-        
+        message_lower = message.casefold()
+
+        # Check if message contains a topic indicator and extract what follows
+        match = _INDICATOR_RE.search(message_lower)
+        if match:
+            potential_topic = match.group(1).strip()
+            # Clean up the topic (remove common words, punctuation)
+            potential_topic = _STRIP_LEAD_RE.sub('', potential_topic)
+            potential_topic = _STRIP_PUNCT_RE.sub('', potential_topic).strip()
+
+            # Only store if it's a meaningful topic (2+ words, not just 'is' etc.)
+            if len(potential_topic.split()) >= 2 and potential_topic not in ('is', 'are', 'do', 'does'):
+                context_manager.execute('add_topic', topic=potential_topic)
+
         # Also check for explicit study requests
-        study_patterns = [
-            r'quiz me on (.+)',
-            r'test me on (.+)',
-            r'flashcards for (.+)',
-            r'study (.+)',
-            r'review (.+)'
-        ]
-        
-        for pattern in study_patterns:
-            match = re.search(pattern, message_lower)
-            if match:
-                topic = match.group(1).strip()
-                if topic:
-                    context_manager.execute('add_topic', topic=topic)
-                    break
+        match = _STUDY_RE.search(message_lower)
+        if match:
+            topic = match.group(1).strip()
+            if topic:
+                context_manager.execute('add_topic', topic=topic)
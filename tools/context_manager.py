@@ -1,10 +1,38 @@
+import functools
+import os
+import time
 from typing import Any, Dict, List, Optional
 from tools.base import Tool
 from tools.persist import PersistTool
-import json
-import os
+from config import config
 from datetime import datetime
 
+_DEFAULT_BASE_PROMPT = """You are StudBotty, a friendly AI study companion. Your role is to:
+- Explain concepts clearly and concisely
+- Answer questions about any subject
+- Help students learn and understand topics
+- Use examples and analogies when helpful
+- Keep responses brief but informative (2-3 paragraphs max)
+- Maintain conversation context and refer back to previous topics when relevant
+
+Be encouraging and educational in your responses."""
+
+# Session timestamps only need second resolution, so the formatted
+# string is reused until the wall clock ticks over — several stamps in
+# one chat turn cost a single datetime allocation.
+_LAST_SECOND = 0
+_LAST_ISO = ''
+
+
+def _now_iso() -> str:
+    global _LAST_SECOND, _LAST_ISO
+    second = time.time_ns() // 1_000_000_000
+    if second != _LAST_SECOND:
+        _LAST_SECOND = second
+        _LAST_ISO = datetime.now().isoformat()
+    return _LAST_ISO
+
+
 class ContextManagerTool(Tool):
     def __init__(self):
         super().__init__(name="context_manager", description="Manage enhanced AI context including user preferences, topics, and persistent memory.")
@@ -16,6 +44,9 @@ class ContextManagerTool(Tool):
             'session_summary': 'session_summary',
             'conversation_topics': 'conversation_topics'
         }
+        # Lazily built lowercase view of important_topics so dedup checks
+        # are a set lookup instead of re-lowercasing the whole list.
+        self._topics_lower = None
 
     @property
     def input_schema(self) -> Dict[str, Any]:
@@ -65,7 +96,7 @@ class ContextManagerTool(Tool):
         """Set user profile information."""
         profile = self._get_data(self.context_keys['user_profile']) or {}
         profile[key] = value
-        profile['updated_at'] = datetime.now().isoformat()
+        profile['updated_at'] = _now_iso()
         return self.persist_tool.execute(self.context_keys['user_profile'], profile)
 
     def _get_user_profile(self, key: str = None) -> Dict[str, Any]:
@@ -81,9 +112,19 @@ class ContextManagerTool(Tool):
             return {"error": "Topic cannot be empty"}
             
         topics = self._get_data(self.context_keys['important_topics']) or []
-        if topic.lower() not in [t.lower() for t in topics]:
-            topics.append(topic)
+        if self._topics_lower is None:
+            self._topics_lower = {t.lower() for t in topics}
+
+        key = topic.lower()
+        if key in self._topics_lower:
+            # Already tracked; skip the rewrite entirely.
+            return {"ok": True}
+
+        self._topics_lower.add(key)
+        topics.append(topic)
+        if len(topics) > 20:
             topics = topics[-20:]  # Keep last 20 topics
+            self._topics_lower = {t.lower() for t in topics}
         return self.persist_tool.execute(self.context_keys['important_topics'], topics)
 
     def _get_important_topics(self) -> List[str]:
@@ -94,7 +135,7 @@ class ContextManagerTool(Tool):
         """Set learning preferences."""
         preferences = self._get_data(self.context_keys['learning_preferences']) or {}
         preferences[key] = value
-        preferences['updated_at'] = datetime.now().isoformat()
+        preferences['updated_at'] = _now_iso()
         return self.persist_tool.execute(self.context_keys['learning_preferences'], preferences)
 
     def _get_learning_preferences(self) -> Dict[str, Any]:
@@ -105,18 +146,26 @@ class ContextManagerTool(Tool):
         """Create a session summary based on conversation history."""
         # This would typically be called with conversation data
         # For now, return a placeholder
-        summary = f"Session summary created at {datetime.now().isoformat()}"
+        summary = f"Session summary created at {_now_iso()}"
         self.persist_tool.execute(self.context_keys['session_summary'], summary)
         return summary
 
     def _get_enhanced_context(self, context_length: int = 10) -> Dict[str, Any]:
-        """Get enhanced context including profile, preferences, and topics."""
+        """Get enhanced context including profile, preferences, and topics.
+
+        One snapshot of the persistence dict serves all four fields
+        instead of a lookup (and potential reparse check) per field.
+        """
+        try:
+            data = self.persist_tool.get_all()
+        except Exception:
+            data = {}
         return {
-            'user_profile': self._get_user_profile(),
-            'learning_preferences': self._get_learning_preferences(),
-            'important_topics': self._get_important_topics(),
-            'session_summary': self._get_data(self.context_keys['session_summary']),
-            'available_at': datetime.now().isoformat()
+            'user_profile': data.get(self.context_keys['user_profile']) or {},
+            'learning_preferences': data.get(self.context_keys['learning_preferences']) or {},
+            'important_topics': data.get(self.context_keys['important_topics']) or [],
+            'session_summary': data.get(self.context_keys['session_summary']),
+            'available_at': _now_iso()
         }
 
     def _clear_topics(self) -> Dict[str, bool]:
@@ -126,28 +175,29 @@ class ContextManagerTool(Tool):
     def _get_data(self, key: str) -> Any:
         """Helper method to get data from persistence."""
         try:
-            # Read directly from the persistence file
-            if os.path.exists("studbotty_data.json"):
-                with open("studbotty_data.json", 'r') as f:
-                    data = json.load(f)
-                    return data.get(key)
+            # Goes through PersistTool's in-memory cache; the file is only
+            # reparsed when its mtime changes.
+            return self.persist_tool.get(key)
         except Exception:
-            pass
-        return None
+            return None
 
     def generate_enhanced_system_prompt(self, base_prompt: str = None) -> str:
-        """Generate an enhanced system prompt with user context."""
-        if not base_prompt:
-            base_prompt = """You are StudBotty, a friendly AI study companion. Your role is to:
-- Explain concepts clearly and concisely
-- Answer questions about any subject
-- Help students learn and understand topics
-- Use examples and analogies when helpful
-- Keep responses brief but informative (2-3 paragraphs max)
-- Maintain conversation context and refer back to previous topics when relevant
+        """Generate an enhanced system prompt with user context.
 
-Be encouraging and educational in your responses."""
+        Called on every chat turn, so the built prompt is memoized on the
+        persistence file's mtime — rebuilding only when the stored
+        profile/preferences/topics actually changed.
+        """
+        if not base_prompt:
+            base_prompt = _DEFAULT_BASE_PROMPT
+        try:
+            mtime_ns = os.stat(config.PERSISTENCE_FILE).st_mtime_ns
+        except OSError:
+            mtime_ns = 0
+        return _build_enhanced_prompt(mtime_ns, base_prompt)
 
+    def _compose_enhanced_prompt(self, base_prompt: str) -> str:
+        """Build the prompt body; only called on memoization misses."""
         enhanced_context = self._get_enhanced_context()
         additional_context = []
 
@@ -179,5 +229,10 @@ Be encouraging and educational in your responses."""
         if additional_context:
             enhanced_prompt = base_prompt + "\n\n" + "\n".join(additional_context)
             return enhanced_prompt
-        
-        return base_prompt
\ No newline at end of file
+
+        return base_prompt
+
+
+@functools.lru_cache(maxsize=8)
+def _build_enhanced_prompt(mtime_ns: int, base_prompt: str) -> str:
+    return ContextManagerTool()._compose_enhanced_prompt(base_prompt)
\ No newline at end of file
@@ -1,7 +1,12 @@
 from typing import Any, Dict
 from tools.base import Tool
+import mmap
 import os
 
+# Above this size the file is mmapped so the kernel pages it in lazily
+# instead of Python buffering the whole thing before decode.
+_MMAP_THRESHOLD = 1 << 20
+
 class FilesTool(Tool):
     def __init__(self):
         super().__init__(name="files", description="Read a file.")
@@ -17,13 +22,24 @@ class FilesTool(Tool):
         }
 
     def execute(self, path: str) -> Dict[str, Any]:
-        if not os.path.exists(path):
+        # One stat covers the existence check and the size — the old
+        # exists/getsize pair resolved the path twice.
+        try:
+            st = os.stat(path)
+        except OSError:
+            return {"error": "File not found"}
+
+        try:
+            with open(path, 'rb') as f:
+                if st.st_size > _MMAP_THRESHOLD:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        content = bytes(mm).decode('utf-8', errors='replace')
+                else:
+                    content = f.read().decode('utf-8', errors='replace')
+        except OSError:
             return {"error": "File not found"}
-        
-        with open(path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
+
         return {
             "content": content,
-            "meta": {"ext": os.path.splitext(path)[1], "size": os.path.getsize(path)}
+            "meta": {"ext": os.path.splitext(path)[1], "size": st.st_size}
         }
@@ -1,6 +1,27 @@
+import functools
 from typing import Dict, Any
 from tools.base import Tool
-import sympy
+from sympy import sympify, latex
+
+# Parsing and LaTeX-rendering an expression dominate a math call; both
+# are pure functions of their input, so repeat queries skip them.
+_sympify = functools.lru_cache(maxsize=512)(sympify)
+
+
+@functools.lru_cache(maxsize=512)
+def _render(expression: str) -> str:
+    """Parse the expression and format the reply; cached per expression."""
+    result = _sympify(expression)
+
+    response = f"The answer is: {result}"
+
+    # Add LaTeX formatting if useful
+    latex_form = latex(result)
+    if latex_form != str(result):
+        response += f"\n\nMathematical notation: {latex_form}"
+
+    return response
+
 
 class MathTool(Tool):
     def __init__(self):
@@ -18,21 +39,6 @@ class MathTool(Tool):
 
     def execute(self, expression: str) -> str:
         try:
-            from sympy import sympify, latex, solve, integrate, diff
-            # Simple heuristic to determine operation
-            expr = sympify(expression)
-            
-            result = expr
-            
-            # Return a user-friendly response
-            response = f"The answer is: {result}"
-            
-            # Add LaTeX formatting if useful
-            latex_form = latex(result)
-            if latex_form != str(result):
-                response += f"\n\nMathematical notation: {latex_form}"
-            
-            return response
-            
+            return _render(expression)
         except Exception as e:
             return f"❌ Sorry, I couldn't solve that. Error: {str(e)}"
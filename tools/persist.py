@@ -1,10 +1,31 @@
+from contextlib import contextmanager
 from typing import Any, Dict
 from tools.base import Tool
+from tools._jsonutil import dumps as _json_dumps, loads as _json_loads
 from config import config
-import json
+import hashlib
+import mmap
 import os
+import threading
+
+# Below this size a plain read() beats mmap's setup cost.
+_MMAP_THRESHOLD = 1 << 20
 
 class PersistTool(Tool):
+    # Shared across instances: several tools construct their own PersistTool
+    # but all target the same file, so the parsed dict and the mtime it was
+    # read at live at class level. The file is only reparsed when it changed
+    # underneath us.
+    _cache: Dict[str, Any] = None
+    _cache_mtime_ns: int = 0
+    _in_batch: bool = False
+    _dirty: bool = False
+    _last_written_hash: bytes = b''
+    # Topic extraction runs on a worker thread while the chat call is in
+    # flight, so the shared cache is guarded. Reentrant because execute
+    # flushes under the same lock.
+    _lock = threading.RLock()
+
     def __init__(self):
         super().__init__(name="persist", description="Save data to local storage.")
 
@@ -19,18 +40,111 @@ class PersistTool(Tool):
             "required": ["key", "value"]
         }
 
+    def _load(self) -> Dict[str, Any]:
+        """Return the persistence dict, reparsing only on mtime change."""
+        cls = PersistTool
+        try:
+            mtime_ns = os.stat(config.PERSISTENCE_FILE).st_mtime_ns
+        except OSError:
+            # No file yet: keep any in-memory state (it may hold mutations
+            # that have not been flushed to a first write).
+            if cls._cache is None:
+                cls._cache = {}
+            cls._cache_mtime_ns = 0
+            return cls._cache
+
+        if cls._cache is not None and mtime_ns == cls._cache_mtime_ns:
+            return cls._cache
+
+        # Cold read (first load or external change). Large files are
+        # mmapped so the parser works straight off the page cache.
+        try:
+            with open(config.PERSISTENCE_FILE, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size > _MMAP_THRESHOLD:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        mv = memoryview(mm)
+                        try:
+                            cls._cache = _json_loads(mv)
+                        finally:
+                            mv.release()
+                else:
+                    cls._cache = _json_loads(f.read())
+        except Exception:
+            cls._cache = {}
+        cls._cache_mtime_ns = mtime_ns
+        # The disk content no longer matches our last write, so the
+        # skip-identical-write guard must not fire against it.
+        cls._last_written_hash = b''
+        return cls._cache
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Read a single value through the in-memory cache."""
+        with PersistTool._lock:
+            return self._load().get(key, default)
+
+    def get_all(self) -> Dict[str, Any]:
+        """Return the whole persistence dict in one cached read."""
+        with PersistTool._lock:
+            return self._load()
+
+    @contextmanager
+    def batch(self):
+        """Coalesce mutations inside the with-block into one file write.
+
+        A chat turn can store several topics back to back; batching turns
+        those N full-file rewrites into one. Nested batches flush at the
+        outermost level.
+        """
+        cls = PersistTool
+        if cls._in_batch:
+            yield self
+            return
+        cls._in_batch = True
+        try:
+            yield self
+        finally:
+            cls._in_batch = False
+            if cls._dirty:
+                self._flush()
+
+    def _flush(self) -> None:
+        """Write the cached dict to disk and re-stamp the mtime."""
+        with PersistTool._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        # Serialize before opening: open('wb') truncates the file, which
+        # would make a _load() at that point see an empty file.
+        payload = _json_dumps(self._load())
+
+        # Re-stamping an identical value is common (session summaries,
+        # unchanged profiles); hashing the payload is far cheaper than a
+        # rewrite, so no-op saves skip the disk entirely.
+        digest = hashlib.blake2b(payload, digest_size=16).digest()
+        if digest == PersistTool._last_written_hash:
+            PersistTool._dirty = False
+            return
+
+        with open(config.PERSISTENCE_FILE, 'wb') as f:
+            f.write(payload)
+        # The cache already holds the new state; re-stamp the mtime so the
+        # write we just did is not mistaken for an external change.
+        try:
+            PersistTool._cache_mtime_ns = os.stat(config.PERSISTENCE_FILE).st_mtime_ns
+        except OSError:
+            pass
+        PersistTool._last_written_hash = digest
+        PersistTool._dirty = False
+
     def execute(self, key: str, value: Any) -> Dict[str, bool]:
-        data = {}
-        if os.path.exists(config.PERSISTENCE_FILE):
-            try:
-                with open(config.PERSISTENCE_FILE, 'r') as f:
-                    data = json.load(f)
-            except:
-                pass
-        
-        data[key] = value
-        
-        with open(config.PERSISTENCE_FILE, 'w') as f:
-            json.dump(data, f, indent=2)
-            
-        return {"ok": True}
+        with PersistTool._lock:
+            data = self._load()
+            data[key] = value
+
+            if PersistTool._in_batch:
+                PersistTool._dirty = True
+                return {"ok": True}
+
+            self._flush_locked()
+            return {"ok": True}
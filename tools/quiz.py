@@ -1,5 +1,21 @@
 from typing import Any, Dict, List
 from tools.base import Tool
+from tools._jsonutil import loads as _json_loads, find_json_array
+from tools._llm_cache import chat_cached
+from config import config
+
+# zip() against this tuple labels the options and bounds them in one go.
+_OPTION_LABELS = ('A', 'B', 'C', 'D', 'E', 'F', 'G', 'H')
+
+# Merged under each question once — one dict build instead of four
+# .get(key, default) calls per iteration.
+_QUESTION_DEFAULTS = {
+    'question': 'No question text',
+    'options': [],
+    'answer': 'No answer',
+    'rationale': 'No explanation'
+}
+
 
 class QuizTool(Tool):
     def __init__(self):
@@ -21,21 +37,13 @@ class QuizTool(Tool):
         prompt = f"Generate {count} {level} multiple-choice questions on '{topic}'. Return ONLY a JSON array with keys: question, options (list), answer (string), rationale."
         
         try:
-            import ollama
-            from config import config
-            
-            response = ollama.chat(model=config.OLLAMA_MODEL, messages=[{'role': 'user', 'content': prompt}])
-            content = response['message']['content']
+            content = chat_cached(config.OLLAMA_MODEL, prompt, 'quiz', level, str(count),
+                                  stream_until_array=True)
             
-            # extract json from content
-            import json
-            import re
-            
-            # Try to find JSON block
-            match = re.search(r'\[.*\]', content, re.DOTALL)
-            if match:
-                json_str = match.group(0)
-                quiz_data = json.loads(json_str)
+            # Try to find JSON block — linear bracket scan, orjson-backed parse
+            json_str = find_json_array(content)
+            if json_str:
+                quiz_data = _json_loads(json_str)
                 return self._format_quiz(quiz_data, topic, level)
             else:
                 # Fallback if no JSON found
@@ -48,33 +56,35 @@ class QuizTool(Tool):
     
     def _format_quiz(self, quiz_data: List[Dict[str, Any]], topic: str, level: str) -> str:
         """Format quiz data into a user-friendly string."""
-        if not isinstance(quiz_data, list) or not quiz_data:
+        if not isinstance(quiz_data, list):
             return f"❌ No quiz questions could be generated for '{topic}'."
-        
+
+        # Validate shape once up front; the loop then indexes directly.
+        quiz_data = [q for q in quiz_data if isinstance(q, dict)]
+        if not quiz_data:
+            return f"❌ No quiz questions could be generated for '{topic}'."
+
         formatted_quiz = [f"🎯 **{topic.title()} Quiz ({level.capitalize()})**\n"]
-        
+        append = formatted_quiz.append  # bound once; skips the attribute lookup per line
+
         for i, question_data in enumerate(quiz_data, 1):
-            if not isinstance(question_data, dict):
-                continue
-                
-            question = question_data.get('question', 'No question text')
-            options = question_data.get('options', [])
-            answer = question_data.get('answer', 'No answer')
-            rationale = question_data.get('rationale', 'No explanation')
-            
+            q = {**_QUESTION_DEFAULTS, **question_data}
+            question = q['question']
+            options = q['options']
+            answer = q['answer']
+            rationale = q['rationale']
+
             # Format question
-            formatted_quiz.append(f"\n**Question {i}:** {question}\n")
+            append(f"\n**Question {i}:** {question}\n")
             
             # Format options
             if options and isinstance(options, list):
-                option_labels = ['A', 'B', 'C', 'D', 'E', 'F']
-                for j, option in enumerate(options):
-                    if j < len(option_labels):
-                        formatted_quiz.append(f"{option_labels[j]}. {option}")
+                for label, option in zip(_OPTION_LABELS, options):
+                    append(f"{label}. {option}")
             
-            formatted_quiz.append(f"\n**Answer:** {answer}")
-            formatted_quiz.append(f"**Explanation:** {rationale}")
-            formatted_quiz.append("\n" + "-" * 50)
+            append(f"\n**Answer:** {answer}")
+            append(f"**Explanation:** {rationale}")
+            append("\n" + "-" * 50)
         
         formatted_quiz.append(f"\n📚 Quiz complete! You got {len(quiz_data)} questions on '{topic}'.")
         
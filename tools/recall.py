@@ -1,9 +1,13 @@
 from typing import Any, Dict, List
-import json
-import re
 from tools.base import Tool
+from tools._jsonutil import loads as _json_loads, find_json_array
+from tools._llm_cache import chat_cached
 from config import config
 
+# Merged under each card once instead of per-field .get calls.
+_CARD_DEFAULTS = {'front': None, 'back': None}
+
+
 class RecallTool(Tool):
     def __init__(self):
         super().__init__(
@@ -27,14 +31,13 @@ class RecallTool(Tool):
         prompt = f"Generate {count} active recall questions for the topic: '{topic}'. For each question, provide a 'front' (the question) and a 'back' (the answer/explanation). Return ONLY a JSON array of objects with 'front' and 'back' keys."
         
         try:
-            import ollama
-            response = ollama.chat(model=config.OLLAMA_MODEL, messages=[{'role': 'user', 'content': prompt}])
-            content = response['message']['content']
+            content = chat_cached(config.OLLAMA_MODEL, prompt, 'recall', str(count),
+                                  stream_until_array=True)
             
-            # Extract JSON
-            match = re.search(r'\[.*\]', content, re.DOTALL)
-            if match:
-                cards = json.loads(match.group(0))
+            # Extract JSON — linear bracket scan, orjson-backed parse
+            json_str = find_json_array(content)
+            if json_str:
+                cards = _json_loads(json_str)
                 return self._format_recall_session(cards, topic)
             else:
                 return f"❌ Could not generate recall questions. Raw response: {content}"
@@ -43,12 +46,15 @@ class RecallTool(Tool):
             return f"❌ Error in recall tool: {str(e)}"
 
     def _format_recall_session(self, cards: List[Dict[str, str]], topic: str) -> str:
+        # Validate shape once; the loop indexes merged dicts directly.
+        cards = [{**_CARD_DEFAULTS, **c} for c in cards if isinstance(c, dict)]
+
         output = [f"🧠 **Active Recall: {topic.title()}**\n"]
         output.append("Try to answer these questions in your head before looking at the answer!\n")
-        
+
         for i, card in enumerate(cards, 1):
-            output.append(f"**Q{i}:** {card.get('front')}")
-            output.append(f"**Answer:** ||{card.get('back')}||") # Using spoiler-like syntax if terminal supports or just text
+            output.append(f"**Q{i}:** {card['front']}")
+            output.append(f"**Answer:** ||{card['back']}||") # Using spoiler-like syntax if terminal supports or just text
             output.append("-" * 30)
             
         output.append("\n💡 *Tip: Spaced repetition works best! Revisit these later.*")
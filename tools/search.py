@@ -2,6 +2,19 @@ from typing import Any, Dict, List
 from tools.base import Tool
 from config import config
 
+# One client for the process: recreating DDGS per search pays a fresh
+# DNS lookup and TLS handshake that a kept-alive session amortizes.
+_DDGS = None
+
+
+def _get_ddgs():
+    global _DDGS
+    if _DDGS is None:
+        from ddgs import DDGS
+        _DDGS = DDGS()
+    return _DDGS
+
+
 class SearchTool(Tool):
     def __init__(self):
         super().__init__(name="search", description="Search the web.")
@@ -21,8 +34,7 @@ class SearchTool(Tool):
             return "Offline mode enabled. Cannot perform web searches."
          
         try:
-            from ddgs import DDGS
-            results = list(DDGS().text(query, max_results=5))
+            results = list(_get_ddgs().text(query, max_results=5))
             
             # Filter out irrelevant results
             filtered_results = []
@@ -43,13 +55,15 @@ class SearchTool(Tool):
             if not filtered_results:
                 return "No relevant results found."
             
-            output = "🔍 Search Results:\n\n"
+            # Collect fragments and join once — += re-copies the whole
+            # string on every iteration.
+            parts = ["🔍 Search Results:\n"]
             for idx, result in enumerate(filtered_results, start=1):
-                output += f"{idx}. **{result['title']}**\n"
-                output += f"   🔗 {result['url']}\n"
-                output += f"   📝 {result['summary']}\n\n"
-            
-            return output.strip()
+                parts.append(f"{idx}. **{result['title']}**\n"
+                             f"   🔗 {result['url']}\n"
+                             f"   📝 {result['summary']}\n")
+
+            return "\n".join(parts).strip()
         except ImportError:
             return "❌ Error: `ddgs` package not installed. Install it using `pip install ddgs`."
         except Exception as e:
@@ -1,8 +1,12 @@
 from typing import Any, Dict, List
 from tools.base import Tool
+from tools._llm_cache import chat_cached
 from config import config
 import os
 
+# Upper bound on the content fed to the model.
+_MAX_CHARS = 4000
+
 class SummaryTool(Tool):
     def __init__(self):
         super().__init__(
@@ -24,20 +28,23 @@ class SummaryTool(Tool):
     def execute(self, content: str = None, path: str = None, style: str = "structured") -> str:
         """Summarize text or file content."""
         if path:
-            if os.path.exists(path):
-                with open(path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-            else:
+            # Only the first _MAX_CHARS make it into the prompt, so read
+            # exactly that much instead of slurping the whole file.
+            try:
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    content = f.read(_MAX_CHARS)
+            except OSError:
                 return f"❌ File not found: {path}"
-        
+        elif content:
+            content = content[:_MAX_CHARS]
+
         if not content:
             return "❌ No content provided to summarize."
 
-        prompt = f"Summarize the following content into {style} study notes. Focus on key concepts and definitions:\n\n{content[:4000]}"
+        prompt = f"Summarize the following content into {style} study notes. Focus on key concepts and definitions:\n\n{content}"
         
         try:
-            import ollama
-            response = ollama.chat(model=config.OLLAMA_MODEL, messages=[{'role': 'user', 'content': prompt}])
-            return f"📝 **Study Summary**\n\n{response['message']['content']}"
+            summary = chat_cached(config.OLLAMA_MODEL, prompt, 'summary', style)
+            return f"📝 **Study Summary**\n\n{summary}"
         except Exception as e:
             return f"❌ Error in summary tool: {str(e)}"
@@ -2,11 +2,127 @@ from typing import Any, Dict
 from tools.base import Tool
 import re
 import os
+import shutil
 import tempfile
 import subprocess
 import platform
+import threading
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
 from config import config
 
+# Compiled once at import: these run for every spoken sentence, and
+# rebuilding the large emoji class per call costs more than the sub.
+_EMOJI_RE = re.compile(
+    "["
+    "\U0001F600-\U0001F64F"  # emoticons
+    "\U0001F300-\U0001F5FF"  # symbols & pictographs
+    "\U0001F680-\U0001F6FF"  # transport & map symbols
+    "\U0001F1E0-\U0001F1FF"  # flags (iOS)
+    "\U00002500-\U00002BEF"  # chinese char
+    "\U00002702-\U000027B0"
+    "\U000024C2-\U0001F251"
+    "\U0001f926-\U0001f937"
+    "\U00010000-\U0010ffff"
+    "\u2640-\u2642"
+    "\u2600-\u2B55"
+    "\u200d"
+    "\u23cf"
+    "\u23e9"
+    "\u231a"
+    "\ufe0f\u200d"
+    "\u3030"
+    "]+", flags=re.UNICODE
+)
+_WS_RE = re.compile(r'\s+')
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Pronunciation fixes. Single-character symbols go through one C-level
+# str.translate pass; the multi-character abbreviations share a single
+# alternation, sorted longest-first so "Mrs." matches before "Mr.".
+_TRANS = str.maketrans({'&': ' and ', '@': ' at ', '#': ' hashtag '})
+_ABBREVIATIONS = {
+    "i.e.": "that is",
+    "e.g.": "for example",
+    "etc.": "et cetera",
+    "vs.": "versus",
+    "Mr.": "Mister",
+    "Mrs.": "Missus",
+    "Dr.": "Doctor",
+    "Prof.": "Professor"
+}
+_ABBR_RE = re.compile(
+    "|".join(re.escape(k) for k in sorted(_ABBREVIATIONS, key=len, reverse=True)))
+
+# Engine init loads the platform speech stack (COM/SAPI on Windows) and
+# costs tens to hundreds of ms, so the engine and its voice list are
+# created once and reused; per-call properties are reset cheaply.
+_ENGINE = None
+_VOICES = None
+_ENGINE_LOCK = threading.Lock()
+
+
+# Batch file synthesis runs one engine per worker thread — pyttsx3
+# engines are not safe to drive from several threads at once.
+_WORKER_LOCAL = threading.local()
+
+
+def _worker_engine():
+    engine = getattr(_WORKER_LOCAL, 'engine', None)
+    if engine is None:
+        import pyttsx3
+        engine = _WORKER_LOCAL.engine = pyttsx3.init()
+    return engine
+
+
+# Fallback backends, also cached: the SAPI COM object on Windows and a
+# long-lived espeak process on Linux, fed lines over stdin so each
+# sentence does not pay a fork+exec.
+_SAPI_VOICE = None
+_ESPEAK_PROC = None
+
+# Probed once at import: trying each Linux TTS binary per call means a
+# fork+exec (or PATH search) per failure before the working one is found.
+_LINUX_TTS_CMD = next(
+    (c for c in ("spd-say", "espeak", "festival") if shutil.which(c)), None)
+
+
+def _get_sapi_voice():
+    global _SAPI_VOICE
+    if _SAPI_VOICE is None:
+        import win32com.client
+        _SAPI_VOICE = win32com.client.Dispatch("SAPI.SpVoice")
+    return _SAPI_VOICE
+
+
+def _espeak_say(text: str) -> None:
+    global _ESPEAK_PROC
+    if _ESPEAK_PROC is None or _ESPEAK_PROC.poll() is not None:
+        _ESPEAK_PROC = subprocess.Popen(["espeak"], stdin=subprocess.PIPE)
+    _ESPEAK_PROC.stdin.write((text.replace("\n", " ") + "\n").encode())
+    _ESPEAK_PROC.stdin.flush()
+
+
+def _get_engine():
+    global _ENGINE, _VOICES
+    with _ENGINE_LOCK:
+        if _ENGINE is None:
+            import logging
+            import pyttsx3
+
+            # Disable comtypes and pyttsx3 debug logging
+            logging.getLogger('comtypes').setLevel(logging.WARNING)
+            logging.getLogger('pyttsx3').setLevel(logging.WARNING)
+
+            _ENGINE = pyttsx3.init()
+            try:
+                _VOICES = _ENGINE.getProperty('voices')
+            except Exception:
+                _VOICES = []
+        return _ENGINE
+
+
 class TTSTool(Tool):
     def __init__(self):
         super().__init__(name="tts", description="Powerful and efficient Text-to-Speech tool.")
@@ -33,110 +149,72 @@ class TTSTool(Tool):
         }
 
     def _remove_emojis(self, text: str) -> str:
-        """Remove emojis from text using optimized regex"""
-        emoji_pattern = re.compile(
-            "["
-            "\U0001F600-\U0001F64F"  # emoticons
-            "\U0001F300-\U0001F5FF"  # symbols & pictographs
-            "\U0001F680-\U0001F6FF"  # transport & map symbols
-            "\U0001F1E0-\U0001F1FF"  # flags (iOS)
-            "\U00002500-\U00002BEF"  # chinese char
-            "\U00002702-\U000027B0"
-            "\U000024C2-\U0001F251"
-            "\U0001f926-\U0001f937"
-            "\U00010000-\U0010ffff"
-            "\u2640-\u2642"
-            "\u2600-\u2B55"
-            "\u200d"
-            "\u23cf"
-            "\u23e9"
-            "\u231a"
-            "\ufe0f\u200d"
-            "\u3030"
-            "]+", flags=re.UNICODE
-        )
-        return emoji_pattern.sub(r'', text)
+        """Remove emojis from text using the precompiled regex"""
+        return _EMOJI_RE.sub('', text)
 
     def _clean_text(self, text: str) -> str:
         """Clean and normalize text for better TTS performance"""
-        # Remove emojis
-        text = self._remove_emojis(text)
-        
+        # Remove emojis; the search short-circuit skips the sub (and its
+        # string allocation) on the common clean-ASCII case
+        if _EMOJI_RE.search(text):
+            text = _EMOJI_RE.sub('', text)
+
+        # Single-character symbols in one C-level translate pass
+        text = text.translate(_TRANS)
+
         # Normalize whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        # Replace common abbreviations for better pronunciation
-        replacements = {
-            "i.e.": "that is",
-            "e.g.": "for example", 
-            "etc.": "et cetera",
-            "vs.": "versus",
-            "Mr.": "Mister",
-            "Mrs.": "Missus",
-            "Dr.": "Doctor",
-            "Prof.": "Professor",
-            "&": "and",
-            "@": "at",
-            "#": "hashtag"
-        }
-        
-        for abbr, full in replacements.items():
-            text = text.replace(abbr, full)
-            
-        return text
+        text = _WS_RE.sub(' ', text).strip()
+
+        # Expand common abbreviations for better pronunciation — one
+        # scan instead of a replace() pass per abbreviation.
+        return _ABBR_RE.sub(lambda m: _ABBREVIATIONS[m.group(0)], text)
 
     def _get_system_voices(self):
-        """Get available system voices efficiently"""
+        """Get available system voices from the cached engine"""
         try:
-            import pyttsx3
-            engine = pyttsx3.init()
-            voices = engine.getProperty('voices')
-            return voices
+            _get_engine()
+            return _VOICES or []
         except:
             return []
 
+    def _apply_voice_settings(self, engine, voice_type: str, speed: float,
+                              volume: float) -> None:
+        """Apply rate, volume and voice selection to an engine instance."""
+        engine.setProperty('rate', int(180 * speed))  # Optimized base rate
+        engine.setProperty('volume', min(max(volume, 0.1), 1.0))
+
+        # Select voice based on type
+        voices = self._get_system_voices()
+
+        if voices:
+            if voice_type == "female" and len(voices) > 1:
+                engine.setProperty('voice', voices[1].id)
+            elif voice_type == "male" and len(voices) > 0:
+                engine.setProperty('voice', voices[0].id)
+            elif voice_type == "robotic" and len(voices) > 2:
+                engine.setProperty('voice', voices[2].id)
+            else:
+                # Use natural voice (usually voices[1] if available)
+                if len(voices) > 1:
+                    engine.setProperty('voice', voices[1].id)
+
     def _optimized_pyttsx3(self, text: str, voice_type: str = "natural",
                            speed: float = 1.0, volume: float = 1.0,
                            save_to_file: bool = False, filename: str = None,
-                           format: str = "mp3") -> str:
+                           format: str = "mp3", _pre_cleaned: bool = False) -> str:
         """Highly optimized pyttsx3 TTS with performance enhancements"""
         try:
-            # Suppress comtypes logging to clean up output
-            import logging
-            import pyttsx3
-            
-            # Disable comtypes and pyttsx3 debug logging
-            logging.getLogger('comtypes').setLevel(logging.WARNING)
-            logging.getLogger('pyttsx3').setLevel(logging.WARNING)
-            
-            # Clean and prepare text
-            clean_text = self._clean_text(text)
-            
+            # Clean and prepare text (skipped when the batch path already
+            # cleaned the full text before splitting it into sentences)
+            clean_text = text if _pre_cleaned else self._clean_text(text)
+
             if not clean_text:
                 return "❌ No valid text to speak"
-                
-            # Initialize engine with optimizations
-            engine = pyttsx3.init()
-            
-            # Apply performance settings
-            engine.setProperty('rate', int(180 * speed))  # Optimized base rate
-            engine.setProperty('volume', min(max(volume, 0.1), 1.0))
-            
-            # Select voice based on type
-            voices = self._get_system_voices()
-            
-            if voices:
-                if voice_type == "female" and len(voices) > 1:
-                    engine.setProperty('voice', voices[1].id)
-                elif voice_type == "male" and len(voices) > 0:
-                    engine.setProperty('voice', voices[0].id)
-                elif voice_type == "robotic" and len(voices) > 2:
-                    engine.setProperty('voice', voices[2].id)
-                else:
-                    # Use natural voice (usually voices[1] if available)
-                    if len(voices) > 1:
-                        engine.setProperty('voice', voices[1].id)
-            
+
+            # Reuse the cached engine; only the properties change per call
+            engine = _get_engine()
+            self._apply_voice_settings(engine, voice_type, speed, volume)
+
             if save_to_file:
                 # Ensure filename has correct extension
                 if not filename:
@@ -168,52 +246,118 @@ class TTSTool(Tool):
             clean_text = self._clean_text(text)
             
             if platform.system() == "Windows":
-                # Windows: Use powershell speech
-                import subprocess
-                cmd = f'powershell -c "Add-Type -AssemblyName System.speech; $speech = New-Object System.Speech.Synthesis.SpeechSynthesizer; $speech.Speak(\"{clean_text}\")"'
-                subprocess.run(cmd, shell=True, check=True)
+                # Windows: in-process SAPI via the cached COM object —
+                # no PowerShell startup and no text interpolated into a
+                # shell command line.
+                _get_sapi_voice().Speak(clean_text)
                 return "🎵 Windows system speech completed"
-                
+
             elif platform.system() == "Darwin":
                 # macOS: Use say command
                 subprocess.run(["say", clean_text], check=True)
                 return "🎵 macOS system speech completed"
-                
+
             elif platform.system() == "Linux":
-                # Linux: Try various TTS commands
-                try:
+                # Linux: the available backend was probed once at import
+                if _LINUX_TTS_CMD == "spd-say":
                     subprocess.run(["spd-say", clean_text], check=True)
                     return "🎵 Linux speech-dispatcher completed"
-                except:
-                    try:
-                        subprocess.run(["espeak", clean_text], check=True)
-                        return "🎵 Linux espeak completed"
-                    except:
-                        try:
-                            subprocess.run(["festival", "--tts", clean_text], check=True)
-                            return "🎵 Linux festival completed"
-                        except:
-                            return "❌ No compatible Linux TTS found"
+                elif _LINUX_TTS_CMD == "espeak":
+                    _espeak_say(clean_text)
+                    return "🎵 Linux espeak completed"
+                elif _LINUX_TTS_CMD == "festival":
+                    subprocess.run(["festival", "--tts", clean_text], check=True)
+                    return "🎵 Linux festival completed"
+                else:
+                    return "❌ No compatible Linux TTS found"
             else:
                 return "❌ Unsupported platform for system TTS"
                 
         except Exception as e:
             return f"❌ System TTS error: {str(e)}"
 
-    def _batch_processing(self, text: str) -> str:
+    def _synth_to_file(self, sentence: str, path: str, voice_type: str = "natural",
+                       speed: float = 1.0, volume: float = 1.0) -> str:
+        """Synthesize one sentence to a WAV part on the worker's engine."""
+        engine = _worker_engine()
+        self._apply_voice_settings(engine, voice_type, speed, volume)
+        engine.save_to_file(sentence, path)
+        engine.runAndWait()
+        return path
+
+    def _concat_wavs(self, paths: list, out_path: str) -> None:
+        """Concatenate WAV parts by copying frames into one file."""
+        out = None
+        try:
+            for path in paths:
+                if not os.path.exists(path):
+                    continue
+                with wave.open(path, 'rb') as part:
+                    if out is None:
+                        out = wave.open(out_path, 'wb')
+                        out.setparams(part.getparams())
+                    out.writeframes(part.readframes(part.getnframes()))
+        finally:
+            if out is not None:
+                out.close()
+
+    def _batch_processing(self, text: str, voice_type: str = "natural",
+                          speed: float = 1.0, volume: float = 1.0,
+                          save_to_file: bool = False, filename: str = None,
+                          format: str = "mp3") -> str:
         """Process large text efficiently using batch processing"""
         if len(text) > 1000:  # For long texts
-            sentences = re.split(r'(?<=[.!?])\s+', text)
+            # Clean the whole text once, then split — running the emoji,
+            # whitespace and abbreviation passes per sentence doubled the
+            # text-processing cost.
+            cleaned = self._clean_text(text)
+            sentences = [s for s in _SENTENCE_SPLIT_RE.split(cleaned)
+                         if len(s) > 10]  # Skip very short fragments
+
+            if save_to_file:
+                # Frame splicing only works for WAV parts; other formats
+                # keep the single save_to_file call, which honors the
+                # requested extension like the short-text path.
+                if format != "wav":
+                    return self._optimized_pyttsx3(
+                        cleaned, voice_type, speed, volume,
+                        save_to_file=True, filename=filename, format=format,
+                        _pre_cleaned=True)
+                # Sentences are independent, so synthesize them in
+                # parallel to their own WAV parts and splice the frames;
+                # wall time drops from the sum to roughly the max.
+                if not filename:
+                    filename = "tts_output.wav"
+                elif not filename.endswith('.wav'):
+                    filename += '.wav'
+                try:
+                    with tempfile.TemporaryDirectory() as tmp_dir:
+                        paths = [os.path.join(tmp_dir, f"part{i}.wav")
+                                 for i in range(len(sentences))]
+                        workers = min(4, os.cpu_count() or 1)
+                        with ThreadPoolExecutor(max_workers=workers) as ex:
+                            list(ex.map(self._synth_to_file, sentences, paths,
+                                        repeat(voice_type), repeat(speed),
+                                        repeat(volume)))
+                        self._concat_wavs(paths, filename)
+                    return f"🎵 Speech saved to {filename} ({len(sentences)} sentences)"
+                except ImportError:
+                    return "❌ pyttsx3 not installed. Install with: pip install pyttsx3"
+                except Exception as e:
+                    return f"❌ TTS error: {str(e)}"
+
+            # Playback has to stay sequential — there is one audio device.
             results = []
-            
             for i, sentence in enumerate(sentences):
-                if len(sentence) > 10:  # Skip very short fragments
-                    result = self._optimized_pyttsx3(sentence)
-                    results.append(f"Part {i+1}: {result}")
-            
+                result = self._optimized_pyttsx3(sentence, voice_type, speed,
+                                                 volume, _pre_cleaned=True)
+                results.append(f"Part {i+1}: {result}")
+
             return "🎵 Batch processing completed:\n" + "\n".join(results)
         else:
-            return self._optimized_pyttsx3(text)
+            return self._optimized_pyttsx3(text, voice_type, speed, volume,
+                                           save_to_file=save_to_file,
+                                           filename=filename, format=format)
 
     def execute(self, text: str, voice: str = "natural", speed: float = 1.0, 
                 volume: float = 1.0, save_to_file: bool = False, 
@@ -227,7 +371,12 @@ class TTSTool(Tool):
         # Clamp values to valid ranges
         speed = max(0.5, min(2.0, speed))
         volume = max(0.1, min(1.0, volume))
-        
+
+        # Long texts go through batch processing (parallel when saving)
+        if len(text) > 1000:
+            return self._batch_processing(text, voice, speed, volume,
+                                          save_to_file, filename, format)
+
         # Try optimized pyttsx3 first
         result = self._optimized_pyttsx3(text, voice, speed, volume, save_to_file, filename, format)
         
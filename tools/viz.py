@@ -1,64 +1,102 @@
 from typing import Any, Dict
 from tools.base import Tool
+from tools._llm_cache import SemanticCache, exact_key
 from config import config
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
 import webbrowser
 import os
 import re
 
+# Generated code keyed by the normalized topic: asking for the same (or
+# a near-identical) diagram again skips the LLM call entirely. Keyed by
+# model and kind so a model switch or mermaid/graphviz flip never
+# returns stale code.
+_VIZ_CACHE = SemanticCache()
+_NORM_STRIP_RE = re.compile(r'[^\w\s]')
+_NORM_WS_RE = re.compile(r'\s+')
 
-class VizTool(Tool):
-    def __init__(self):
-        super().__init__(name="viz", description="Generate a diagram using Mermaid or Graphviz.")
-    
-    @property
-    def input_schema(self) -> Dict[str, Any]:
-        return {
-            "type": "object",
-            "properties": {
-                "kind": {"type": "string", "enum": ["mermaid", "graphviz"]},
-                "content": {"type": "string"}
-            },
-            "required": ["kind", "content"]
-        }
 
-    def execute(self, kind: str, content: str) -> str:
-        """Generate a diagram using AI to create Mermaid or Graphviz code."""
-        
-        try:
-            import ollama
-            
-            # Check if Ollama service is available
-            try:
-                # Test if Ollama service is running
-                ollama.list()
-            except Exception as e:
-                return f"❌ Ollama service is not available or not running. Please start Ollama service. Error: {str(e)}"
-            
-            # Step 1: Research the topic to get structured data
-            research_prompt = f"""Analyze the following topic for a detailed diagram: {content}
-            
-            Provide a comprehensive analysis including:
-            1. Main processes/steps involved
-            2. Key components and their roles
-            3. Inputs and outputs for each step
-            4. How the steps connect to each other
-            5. Important intermediate products
-            
-            Format as a structured list with clear labels. Be specific and informative.
-            
-            IMPORTANT: Focus on the specific topic provided, not generic examples.
-            """
-              
-            research_response = ollama.chat(
-                model=config.OLLAMA_MODEL,
-                messages=[{'role': 'user', 'content': research_prompt}]
-            )
-            research_data = research_response['message']['content'].strip()
-              
-            # Step 2: Generate Diagram based on research
-            if kind == "mermaid":
-                prompt = f"""Generate a detailed Mermaid flowchart based on this analysis:
-{research_data}
+def _normalize_content(content: str) -> str:
+    """Casefold, strip punctuation and collapse whitespace for cache keys."""
+    return _NORM_WS_RE.sub(' ', _NORM_STRIP_RE.sub('', content.casefold())).strip()
+
+# Compiled once: the syntax fixer runs several of these per diagram
+# line, so literal-pattern re.match calls would pay the compile-cache
+# lookup on every iteration.
+_ID_RE = re.compile(r'^([A-Za-z0-9_]+)')
+_COLON_DEF_RE = re.compile(r'^([A-Za-z0-9_]+):\s*(.+)$')
+_NODE_BRACE_RE = re.compile(r'^node\s+([A-Za-z0-9_]+)\[([^\]]+)\]\s*\{[^}]*\}\s*$')
+_STYLE_NODE_RE = re.compile(r'^node\s*\{[^}]*\}\s*([A-Za-z0-9_]+)\[([^\]]+)\]\s*$')
+_BARE_NODE_RE = re.compile(r'^node\s*$')
+_NODE_DEF_RE = re.compile(r'^([A-Za-z0-9_]+)\[')
+_GENERIC_LABEL_RE = re.compile(r'^\s*([A-Za-z0-9_]+)\[(Process|Input|Output|Node|Step)\]$')
+# Single-character deletions run in C via str.translate; no pattern
+# machinery needed just to drop braces from labels.
+_DROP_BRACES = str.maketrans('', '', '{}')
+_UNSAFE_CHAR_RE = re.compile(r'[^A-Za-z0-9_\s]')
+_ID_SEP_RE = re.compile(r'[_-]')
+
+# Known biology/chemistry node names and their display labels. Built
+# once instead of per _generate_descriptive_label call; the items view
+# for substring fallback is ordered longest key first so the most
+# specific match wins ('respiration' before 'carbon', etc.).
+_LABEL_MAP = {
+    'glycolysis': 'Glycolysis',
+    'krebs': 'Krebs Cycle',
+    'citric': 'Citric Acid Cycle',
+    'electron': 'Electron Transport',
+    'atp': 'ATP Production',
+    'nadh': 'NADH Production',
+    'fadh2': 'FADH2 Production',
+    'glucose': 'Glucose',
+    'pyruvate': 'Pyruvate',
+    'acetyl': 'Acetyl-CoA',
+    'co2': 'Carbon Dioxide',
+    'h2o': 'Water',
+    'oxygen': 'Oxygen',
+    'mitochondria': 'Mitochondria',
+    'cellular': 'Cellular Respiration',
+    'respiration': 'Cellular Respiration',
+    'photosynthesis': 'Photosynthesis',
+    'chlorophyll': 'Chlorophyll',
+    'light': 'Light Reactions',
+    'dark': 'Calvin Cycle',
+    'carbon': 'Carbon Fixation',
+}
+_LABEL_ITEMS = tuple(sorted(_LABEL_MAP.items(), key=lambda kv: len(kv[0]), reverse=True))
+
+# The fixer runs on untrusted model output; bounding its input keeps the
+# regex passes' runtime deterministic even for pathological responses.
+# No real diagram comes close to either cap.
+_MAX_CODE_CHARS = 65536
+_MAX_LINE_CHARS = 2048
+
+# Separates the model's analysis from the diagram code in the merged
+# single-call prompt; everything before it is context, everything after
+# is code.
+_CODE_MARKER = '===CODE==='
+
+# Static instructions live in the system message, byte-identical across
+# calls, so Ollama's prefix cache can reuse their prefill KV entries;
+# only the short user message changes per topic. Built once at import.
+_ANALYSIS_INSTRUCTIONS = """You create educational diagrams. Analyze the topic the user gives you for a detailed diagram.
+
+Provide a comprehensive analysis including:
+1. Main processes/steps involved
+2. Key components and their roles
+3. Inputs and outputs for each step
+4. How the steps connect to each other
+5. Important intermediate products
+
+Format as a structured list with clear labels. Be specific and informative.
+
+IMPORTANT: Focus on the specific topic provided, not generic examples.
+"""
+
+_MERMAID_SYSTEM = _ANALYSIS_INSTRUCTIONS + f"""
+Then generate a detailed Mermaid flowchart based on your analysis.
 
 IMPORTANT: Create a comprehensive, informative diagram that clearly shows the process flow.
 
@@ -91,69 +129,30 @@ graph TD
     NADPH --> CalvinCycle
     CalvinCycle --> Glucose([Glucose])
 
-Generate ONLY the Mermaid code. Do NOT include markdown code fences.
+Output format: emit your analysis, then a line containing exactly {_CODE_MARKER}, then ONLY the Mermaid code. Do NOT include markdown code fences.
 """
-            else:
-                prompt = f"""Generate Graphviz DOT code based on this analysis:
-{research_data}
 
-IMPORTANT: Return ONLY the DOT code, nothing else. No explanations, no markdown code fences.
+_GRAPHVIZ_SYSTEM = _ANALYSIS_INSTRUCTIONS + f"""
+Then generate Graphviz DOT code based on your analysis.
+
+Output format: emit your analysis, then a line containing exactly {_CODE_MARKER}, then ONLY the DOT code. No explanations after the marker, no markdown code fences.
 """
-              
-            response = ollama.chat(
-                model=config.OLLAMA_MODEL,
-                messages=[{'role': 'user', 'content': prompt}]
-            )
-            code = response['message']['content'].strip()
-              
-            # Clean up common formatting issues
-            # Remove markdown code fences if present
-            if code.startswith('```'):
-                lines = code.split('\n')
-                # Remove first line (```mermaid or ```dot)
-                lines = lines[1:]
-                # Remove last line if it's ```
-                if lines and lines[-1].strip() == '```':
-                    lines = lines[:-1]
-                code = '\n'.join(lines).strip()
-            
-            # Remove any trailing text that's not part of the Mermaid code
-            # Look for common patterns that indicate the end of Mermaid code
-            mermaid_end_patterns = [
-                '```',
-                'Final Answer:',
-                'The final answer is',
-                '$\\boxed{'
-            ]
-            
-            lines = code.split('\n')
-            mermaid_lines = []
-            for line in lines:
-                line_stripped = line.strip()
-                if any(pattern in line_stripped for pattern in mermaid_end_patterns):
-                    break
-                mermaid_lines.append(line)
-            
-            code = '\n'.join(mermaid_lines).strip()
-              
-            # Fix common Mermaid syntax errors from smaller models
-            # Remove 'end' keyword if there are no subgraphs (common hallucination)
-            if 'subgraph' not in code.lower():
-                lines = code.split('\n')
-                lines = [line for line in lines if line.strip().lower() != 'end']
-                code = '\n'.join(lines).strip()
-              
-            # Generate viewable URL using Mermaid.ink service
-            if kind == "mermaid":
-                # Apply additional Mermaid syntax validation and correction
-                code = self._fix_mermaid_syntax(code)
 
-                # Ensure the Mermaid code is valid
-                if not code.startswith('graph'):
-                    code = f"graph TD\n{code}"
+# Patterns that signal the model has finished the diagram and started
+# rambling. Seen mid-stream they abort the pull (cancelling generation
+# server-side); seen in a full response they truncate it.
+_END_PATTERNS = (
+    '```',
+    'Final Answer:',
+    'The final answer is',
+    '$\\boxed{'
+)
 
-                # Save the Mermaid code to a local HTML file for viewing
-                html_content = f"""
+# The page shell is static apart from the diagram itself; building
+# it once at import replaces the per-call ~4 KB f-string (and its
+# doubled-brace escaping throughout the CSS and JS) with a single
+# placeholder substitution.
+_HTML_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -162,7 +161,7 @@ IMPORTANT: Return ONLY the DOT code, nothing else. No explanations, no markdown
     <title>StudBotty - Mermaid Diagram</title>
     <script src="https://cdn.jsdelivr.net/npm/mermaid/dist/mermaid.min.js"></script>
     <style>
-        :root {{
+        :root {
             --primary-color: #667eea;
             --secondary-color: #764ba2;
             --bg-color: #f8f9fa;
@@ -170,22 +169,22 @@ IMPORTANT: Return ONLY the DOT code, nothing else. No explanations, no markdown
             --text-color: #333;
             --border-radius: 12px;
             --shadow: 0 8px 32px rgba(0, 0, 0, 0.1);
-        }}
+        }
         
-        * {{
+        * {
             box-sizing: border-box;
             margin: 0;
             padding: 0;
-        }}
+        }
         
-        body {{
+        body {
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, Cantarell, 'Open Sans', 'Helvetica Neue', sans-serif;
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             min-height: 100vh;
             padding: 20px;
-        }}
+        }
         
-        .container {{
+        .container {
             max-width: 1000px;
             margin: 0 auto;
             background: rgba(255, 255, 255, 0.95);
@@ -194,76 +193,76 @@ IMPORTANT: Return ONLY the DOT code, nothing else. No explanations, no markdown
             box-shadow: var(--shadow);
             overflow: hidden;
             border: 1px solid rgba(255, 255, 255, 0.2);
-        }}
+        }
         
-        .header {{
+        .header {
             background: linear-gradient(135deg, var(--primary-color), var(--secondary-color));
             color: white;
             padding: 30px;
             text-align: center;
-        }}
+        }
         
-        .header h1 {{
+        .header h1 {
             font-size: 2.5rem;
             font-weight: 700;
             margin-bottom: 10px;
             text-shadow: 0 2px 4px rgba(0, 0, 0, 0.3);
-        }}
+        }
         
-        .header p {{
+        .header p {
             font-size: 1.1rem;
             opacity: 0.9;
-        }}
+        }
         
-        .content {{
+        .content {
             padding: 40px;
-        }}
+        }
         
-        .diagram-container {{
+        .diagram-container {
             background: var(--card-bg);
             border-radius: var(--border-radius);
             padding: 30px;
             margin-bottom: 30px;
             box-shadow: var(--shadow);
             border: 1px solid #e9ecef;
-        }}
+        }
         
-        .mermaid {{
+        .mermaid {
             text-align: center;
             overflow-x: auto;
-        }}
+        }
         
-        .footer {{
+        .footer {
             background: #f8f9fa;
             padding: 20px;
             text-align: center;
             color: #6c757d;
             border-top: 1px solid #e9ecef;
-        }}
+        }
         
-        .footer a {{
+        .footer a {
             color: var(--primary-color);
             text-decoration: none;
             font-weight: 600;
-        }}
+        }
         
-        .footer a:hover {{
+        .footer a:hover {
             text-decoration: underline;
-        }}
+        }
         
-        @media (max-width: 768px) {{
-            .header h1 {{
+        @media (max-width: 768px) {
+            .header h1 {
                 font-size: 2rem;
-            }}
+            }
             
-            .content {{
+            .content {
                 padding: 20px;
-            }}
+            }
             
-            .diagram-container {{
+            .diagram-container {
                 padding: 20px;
-            }}
-        }}
+            }
+        }
     </style>
 </head>
 <body>
@@ -275,7 +274,7 @@ IMPORTANT: Return ONLY the DOT code, nothing else. No explanations, no markdown
         <div class="content">
             <div class="diagram-container">
                 <div class="mermaid">
-                    {code}
+                    $CODE
                 </div>
             </div>
         </div>
@@ -284,57 +283,148 @@ IMPORTANT: Return ONLY the DOT code, nothing else. No explanations, no markdown
         </div>
     </div>
     <script>
-        mermaid.initialize({{
-            startOnLoad: true,
+        mermaid.initialize({
+            startOnLoad: false,
             theme: 'default',
-            themeVariables: {{
+            themeVariables: {
                 primaryColor: '#667eea',
                 primaryTextColor: '#fff',
                 primaryBorderColor: '#764ba2',
                 lineColor: '#667eea',
                 secondaryColor: '#f8f9fa',
                 tertiaryColor: '#ffffff'
-            }}
-        }});
-        
+            }
+        });
+
+        // Render once per diagram: the SVG is cached in localStorage
+        // keyed by a hash of the Mermaid source, so re-opening the same
+        // diagram skips the parse and layout entirely.
+        document.addEventListener('DOMContentLoaded', async function() {
+            const el = document.querySelector('.mermaid');
+            let key = null;
+            try {
+                const bytes = new TextEncoder().encode(el.textContent.trim());
+                const digest = await crypto.subtle.digest('SHA-1', bytes);
+                key = 'mmd:' + Array.from(new Uint8Array(digest))
+                    .map(b => b.toString(16).padStart(2, '0')).join('');
+                const cached = localStorage.getItem(key);
+                if (cached) {
+                    el.outerHTML = cached;
+                    return;
+                }
+            } catch (e) {
+                // Storage or WebCrypto unavailable (some file:// setups)
+            }
+            await mermaid.run();
+            if (key) {
+                try {
+                    localStorage.setItem(key, document.querySelector('.mermaid').outerHTML);
+                } catch (e) {
+                    // Quota exceeded or storage blocked; rendering still worked
+                }
+            }
+        });
+
         // Add some interactivity
-        document.addEventListener('DOMContentLoaded', function() {{
+        document.addEventListener('DOMContentLoaded', function() {
             const mermaidElements = document.querySelectorAll('.mermaid');
-            mermaidElements.forEach(element => {{
-                element.addEventListener('click', function(e) {{
-                    if (e.target.tagName === 'text' || e.target.tagName === 'tspan') {{
+            mermaidElements.forEach(element => {
+                element.addEventListener('click', function(e) {
+                    if (e.target.tagName === 'text' || e.target.tagName === 'tspan') {
                         const text = e.target.textContent || e.target.innerText;
-                        if (text) {{
+                        if (text) {
                             // Add a subtle highlight effect
                             e.target.style.fill = '#667eea';
-                            setTimeout(() => {{
+                            setTimeout(() => {
                                 e.target.style.fill = '#333';
-                            }}, 500);
-                        }}
-                    }}
-                }});
-            }});
-        }});
+                            }, 500);
+                        }
+                    }
+                });
+            });
+        });
     </script>
 </body>
 </html>
 """
+
+# The ollama.list() health probe is a full HTTP round trip that carries
+# no payload we use — it runs on this worker concurrently with the first
+# chat call instead of serially in front of it, and is skipped entirely
+# while a recent call has proven the service reachable.
+_HEALTH_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix='viz-health')
+_HEALTH_TTL_SECONDS = 30.0
+_LAST_HEALTH_OK = 0.0
+
+# One client for every call: the module-level ollama.chat/ollama.list
+# helpers build a fresh HTTP client per invocation, paying a TCP (and
+# possibly TLS) handshake each time. A shared Client keeps the
+# connection alive across requests.
+_OLLAMA_CLIENT = None
+
+
+def _get_client():
+    """Create the shared ollama client on first use."""
+    global _OLLAMA_CLIENT
+    if _OLLAMA_CLIENT is None:
+        import ollama
+        _OLLAMA_CLIENT = ollama.Client()
+    return _OLLAMA_CLIENT
+
+
+class VizTool(Tool):
+    def __init__(self):
+        super().__init__(name="viz", description="Generate a diagram using Mermaid or Graphviz.")
+    
+    @property
+    def input_schema(self) -> Dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "kind": {"type": "string", "enum": ["mermaid", "graphviz"]},
+                "content": {"type": "string"}
+            },
+            "required": ["kind", "content"]
+        }
+
+    def execute(self, kind: str, content: str, html_file: str = "diagram.html") -> str:
+        """Generate a diagram using AI to create Mermaid or Graphviz code."""
+
+        try:
+            # A repeat (or near-repeat) topic serves the previously
+            # generated code straight from the cache — no LLM round trip.
+            content_norm = _normalize_content(content)
+            context_hash = exact_key(config.OLLAMA_MODEL, 'viz', kind)
+            code = _VIZ_CACHE.get(content_norm, context_hash)
+            if code is None:
+                code = self._generate_code(kind, content)
+                _VIZ_CACHE.put(content_norm, context_hash, code)
+
+            if kind == "mermaid":
+                # Save the Mermaid code to a local HTML file for viewing
+                html_content = _HTML_TEMPLATE.replace("$CODE", code)
                   
-                # Save the HTML to a file
-                html_file = "diagram.html"
-                with open(html_file, 'w', encoding='utf-8') as f:
+                # Save the HTML to a file. Written to a temp file and
+                # swapped in atomically so the browser can never load a
+                # half-written page.
+                with open(html_file + ".tmp", 'w', encoding='utf-8') as f:
                     f.write(html_content)
+                os.replace(html_file + ".tmp", html_file)
                   
-                # Open the HTML file in the default browser
-                try:
-                    webbrowser.open(f'file://{os.path.abspath(html_file)}')
-                    opened_msg = "\n✅ Diagram opened in browser."
-                except Exception as e:
-                    opened_msg = f"\n⚠️ Could not open browser automatically: {e}\n📁 You can manually open the file: {os.path.abspath(html_file)}"
+                # Open the HTML file in the default browser. Launched on
+                # a daemon thread (as the flashcard tool does) so the
+                # reply is not held up by xdg-open/open, which can block
+                # for hundreds of ms while the browser starts.
+                threading.Thread(
+                    target=webbrowser.open,
+                    args=(f'file://{os.path.abspath(html_file)}',),
+                    daemon=True
+                ).start()
+                opened_msg = f"\n✅ Diagram opened in browser.\n📁 If it does not appear, open the file manually: {os.path.abspath(html_file)}"
 
                 return f"""📊 Diagram generated successfully!{opened_msg}
 
-The diagram has been saved to `diagram.html` and opened in your browser.
+The diagram has been saved to `{html_file}` and opened in your browser.
 
 ```mermaid
 {code}
@@ -351,87 +441,177 @@ You can paste this into: https://dreampuf.github.io/GraphvizOnline/"""
               
         except ImportError:
             return "❌ Ollama is not installed. Please install it to use visualization features.\n\n💡 You can install Ollama from: https://ollama.ai/"
+        except ConnectionError as e:
+            return f"❌ Ollama service is not available or not running. Please start Ollama service. Error: {str(e)}"
         except Exception as e:
             return f"❌ Sorry, I couldn't generate the diagram. Error: {str(e)}\n\n🔧 Troubleshooting tips:\n1. Make sure Ollama is installed and running\n2. Try running 'ollama serve' to start the service\n3. Check that the model '{config.OLLAMA_MODEL}' is available with 'ollama list'"
 
+    def _generate_code(self, kind: str, content: str) -> str:
+        """Run the single merged LLM call and return cleaned diagram code.
+
+        Raises ConnectionError when the Ollama service itself is down so
+        execute can surface the friendly service message.
+        """
+        global _LAST_HEALTH_OK
+
+        client = _get_client()
+
+        # Kick the service health check off in parallel with the chat
+        # call; its verdict is only consulted if that call fails, so the
+        # probe's round trip is fully overlapped. A chat that succeeded
+        # within the TTL already proves the service is up, so no probe
+        # is started at all on the warm path.
+        health_future = None
+        if time.monotonic() - _LAST_HEALTH_OK > _HEALTH_TTL_SECONDS:
+            health_future = _HEALTH_EXECUTOR.submit(client.list)
+
+        # One call does both steps: the model analyzes the topic and
+        # then emits the diagram after the marker. The static
+        # instructions ride in the system message (identical bytes every
+        # call, so the server reuses their prefill); only this short
+        # user message is new work.
+        messages = [
+            {'role': 'system',
+             'content': _MERMAID_SYSTEM if kind == "mermaid" else _GRAPHVIZ_SYSTEM},
+            {'role': 'user', 'content': f"Topic: {content}"},
+        ]
+
+        try:
+            # Pull the response token by token and stop as soon as the
+            # model starts its post-diagram commentary — breaking out of
+            # the stream cancels the remaining decode server-side, so
+            # the rambling tail is never paid for.
+            buf = ''
+            marker_end = -1
+            stream = client.chat(
+                model=config.OLLAMA_MODEL,
+                messages=messages,
+                stream=True
+            )
+            for chunk in stream:
+                piece = chunk['message']['content']
+                if not piece:
+                    continue
+                # Only the tail a pattern could straddle is rescanned.
+                scan_from = max(0, len(buf) - 32)
+                buf += piece
+                if marker_end < 0:
+                    idx = buf.find(_CODE_MARKER, scan_from)
+                    if idx >= 0:
+                        marker_end = idx + len(_CODE_MARKER)
+                if marker_end >= 0:
+                    # Skip the first few characters so an opening code
+                    # fence right after the marker is not mistaken for
+                    # the tail; cleanup below strips fences either way.
+                    search_from = max(marker_end + 4, scan_from)
+                    if any(buf.find(p, search_from) >= 0 for p in _END_PATTERNS):
+                        break
+        except Exception:
+            # Distinguish "service down" from a genuine chat error.
+            try:
+                if health_future is not None:
+                    health_future.result()
+                else:
+                    client.list()
+            except Exception as e:
+                raise ConnectionError(str(e)) from None
+            raise
+        _LAST_HEALTH_OK = time.monotonic()
+        # Everything before the marker is the model's analysis; only
+        # the code after it moves on. Without a marker (older or
+        # less obedient models) the full response is used as before.
+        code = buf.split(_CODE_MARKER, 1)[-1].strip()
+
+        # Clean up common formatting issues in one pass over the lines:
+        # strip a leading markdown fence, stop at trailing prose (the
+        # stream usually quit mid-tail, so this trims the remainder) and
+        # drop hallucinated 'end' keywords when there are no subgraphs.
+        # One split and one join instead of a cycle per fix.
+        lines = code.split('\n')
+        if lines and lines[0].startswith('```'):
+            del lines[0]
+        has_subgraph = 'subgraph' in code.lower()
+        cleaned_lines = []
+        for line in lines:
+            line_stripped = line.strip()
+            if any(pattern in line_stripped for pattern in _END_PATTERNS):
+                break
+            if not has_subgraph and line_stripped.lower() == 'end':
+                continue
+            cleaned_lines.append(line)
+
+        code = '\n'.join(cleaned_lines).strip()
+
+        if kind == "mermaid":
+            # Apply additional Mermaid syntax validation and correction
+            code = self._fix_mermaid_syntax(code)
+
+            # Ensure the Mermaid code is valid
+            if not code.startswith('graph'):
+                code = f"graph TD\n{code}"
+
+        return code
+
     def _fix_mermaid_syntax(self, code: str) -> str:
         """Fix common Mermaid syntax errors with comprehensive validation."""
         if not code or not isinstance(code, str):
             return "graph TD\n    A[Empty Response]"
-        
-        lines = code.split('\n')
+
+        # Cap total and per-line size before any regex work
+        if len(code) > _MAX_CODE_CHARS:
+            code = code[:_MAX_CODE_CHARS]
+
+        # One pass over the lines: each is fixed in place while node
+        # definitions and connection references accumulate, replacing
+        # the old collect / fix / re-validate walks (three full sweeps
+        # plus two join-and-resplit round trips of the whole diagram).
         fixed_lines = []
+        seen = set()  # membership mirror of fixed_lines: O(1) dedup
         graph_found = False
         defined_nodes = set()
         referenced_nodes = set()
-        
-        # First pass: collect all referenced nodes
-        for line in lines:
-            line = line.strip()
-            if not line or line.startswith('graph') or line.startswith('//') or line.startswith('%%'):
-                continue
-            
-            # Find all node references in connections
-            if ' --> ' in line:
-                parts = line.split(' --> ')
-                if len(parts) == 2:
-                    source = parts[0].strip()
-                    target = parts[1].strip()
-                    
-                    # Extract node IDs
-                    source_match = re.match(r'^([A-Za-z0-9_]+)', source)
-                    target_match = re.match(r'^([A-Za-z0-9_]+)', target)
-                    
-                    if source_match:
-                        referenced_nodes.add(source_match.group(1))
-                    if target_match:
-                        referenced_nodes.add(target_match.group(1))
-        
-        # Second pass: fix lines and collect defined nodes
-        for line in lines:
-            original_line = line
-            line = line.strip()
+
+        for original_line in code.split('\n'):
+            original_line = original_line[:_MAX_LINE_CHARS]
+            line = original_line.strip()
             if not line:
                 continue
-                
+
             # Skip empty lines and comments
             if line.startswith('//') or line.startswith('%%'):
                 fixed_lines.append(original_line)
                 continue
-            
+
             # Ensure we have a graph declaration
             if line.startswith('graph '):
                 graph_found = True
                 fixed_lines.append(line)
                 continue
-                
+
             # Fix "Start: Text" or "End: Text" style definitions
-            colon_pattern = r'^([A-Za-z0-9_]+):\s*(.+)$'
-            match = re.match(colon_pattern, line)
+            match = _COLON_DEF_RE.match(line)
             if match:
                 node_id, label = match.groups()
                 # Clean the label - remove problematic characters
-                clean_label = re.sub(r'[{}]', '', label).strip()
+                clean_label = label.translate(_DROP_BRACES).strip()
                 # Create a proper node definition
                 line = f"{node_id}[{clean_label}]"
                 defined_nodes.add(node_id)
             
             # Fix malformed "node Circle[Sun] {Light Energy}" style definitions
-            node_pattern = r'^node\s+([A-Za-z0-9_]+)\[([^\]]+)\]\s*\{[^}]*\}\s*$'
-            match = re.match(node_pattern, line)
+            match = _NODE_BRACE_RE.match(line)
             if match:
                 node_id, label = match.groups()
                 # Clean label - remove problematic characters
-                clean_label = re.sub(r'[{}]', '', label)
+                clean_label = label.translate(_DROP_BRACES)
                 line = f"{node_id}[{clean_label}]"
                 defined_nodes.add(node_id)
             
             # Fix "node {Blue} Label[Text]" style definitions  
-            style_node_pattern = r'^node\s*\{[^}]*\}\s*([A-Za-z0-9_]+)\[([^\]]+)\]\s*$'
-            match = re.match(style_node_pattern, line)
+            match = _STYLE_NODE_RE.match(line)
             if match:
                 node_id, label = match.groups()
-                clean_label = re.sub(r'[{}]', '', label)
+                clean_label = label.translate(_DROP_BRACES)
                 line = f"{node_id}[{clean_label}]"
                 defined_nodes.add(node_id)
             
@@ -440,12 +620,12 @@ You can paste this into: https://dreampuf.github.io/GraphvizOnline/"""
                 content = line[5:].strip()
                 if content:
                     # Create safe node ID and label
-                    content_clean = re.sub(r'[^A-Za-z0-9_\s]', '', content).strip()
+                    content_clean = _UNSAFE_CHAR_RE.sub('', content).strip()
                     if content_clean:
                         # Replace spaces with underscores for node ID, limit length
-                        node_id = re.sub(r'\s+', '_', content_clean)[:20]
+                        node_id = _NORM_WS_RE.sub('_', content_clean)[:20]
                         # Clean label for display
-                        clean_label = re.sub(r'[{}]', '', content_clean)
+                        clean_label = content_clean.translate(_DROP_BRACES)
                         line = f"{node_id}[{clean_label}]"
                         defined_nodes.add(node_id)
                     else:
@@ -470,7 +650,7 @@ You can paste this into: https://dreampuf.github.io/GraphvizOnline/"""
                 line = line[4:]
             
             # Remove duplicate connections
-            if line in fixed_lines:
+            if line in seen:
                 continue
             
             # Fix malformed node connections with comprehensive cleaning
@@ -478,23 +658,25 @@ You can paste this into: https://dreampuf.github.io/GraphvizOnline/"""
                 parts = line.split(' --> ')
                 if len(parts) == 2:
                     source, target = parts
-                    
+
                     # Extract node IDs from source and target
-                    source_match = re.match(r'^([A-Za-z0-9_]+)', source.strip())
-                    target_match = re.match(r'^([A-Za-z0-9_]+)', target.strip())
-                    
+                    source_match = _ID_RE.match(source.strip())
+                    target_match = _ID_RE.match(target.strip())
+
                     if source_match and target_match:
                         source_id = source_match.group(1)
                         target_id = target_match.group(1)
-                        
-                        # Ensure both nodes are defined or will be defined
+
+                        # Both endpoints must end up defined
+                        referenced_nodes.add(source_id)
+                        referenced_nodes.add(target_id)
                         line = f"{source_id} --> {target_id}"
                     else:
                         # Skip malformed connection lines
                         continue
             
             # Remove problematic lines
-            if re.match(r'^node\s*$', line):
+            if _BARE_NODE_RE.match(line):
                 continue
             
             # Skip lines that are clearly malformed
@@ -502,154 +684,54 @@ You can paste this into: https://dreampuf.github.io/GraphvizOnline/"""
                 continue
                 
             # Check if this line defines a node
-            node_match = re.match(r'^([A-Za-z0-9_]+)\[', line)
+            node_match = _NODE_DEF_RE.match(line)
             if node_match:
                 defined_nodes.add(node_match.group(1))
-                
+
+                # Upgrade generic labels (Process, Input, ...) in place
+                match = _GENERIC_LABEL_RE.match(line)
+                if match:
+                    node_id, generic_label = match.groups()
+                    better_label = self._generate_descriptive_label(node_id)
+                    line = f"    {node_id}[{better_label}]"
+
             fixed_lines.append(line)
-        
+            seen.add(line)
+
         # If no graph declaration found, add one
-        if not graph_found and fixed_lines:
-            fixed_lines.insert(0, "graph TD")
-        elif not fixed_lines:
+        if not fixed_lines:
             return "graph TD\n    A[No valid diagram content generated]\n    A --> B[Please try again]"
-        
-        # Add missing node definitions and improve generic ones
+        if not graph_found:
+            fixed_lines.insert(0, "graph TD")
+
+        # Define every node that was referenced but never defined —
+        # computed once from the sets the pass maintained.
         missing_nodes = referenced_nodes - defined_nodes
         if missing_nodes:
-            # Insert missing node definitions after the graph declaration
             graph_index = next(i for i, line in enumerate(fixed_lines) if line.startswith('graph'))
-            for node_id in sorted(missing_nodes):
-                # Create a descriptive node definition for missing nodes
+            for offset, node_id in enumerate(sorted(missing_nodes), start=1):
                 clean_label = self._generate_descriptive_label(node_id)
-                fixed_lines.insert(graph_index + 1, f"    {node_id}[{clean_label}]")
-                defined_nodes.add(node_id)
-        
-        # Improve generic node labels
-        improved_lines = []
-        for line in fixed_lines:
-            # Check if this is a node definition with a generic label
-            generic_pattern = r'^\s*([A-Za-z0-9_]+)\[(Process|Input|Output|Node|Step)\]$'
-            match = re.match(generic_pattern, line)
-            if match:
-                node_id, generic_label = match.groups()
-                # Generate a better label based on context
-                better_label = self._generate_descriptive_label(node_id)
-                line = f"    {node_id}[{better_label}]"
-            improved_lines.append(line)
-        
-        fixed_lines = improved_lines
-        
-        # Join and clean up
-        fixed_code = '\n'.join(fixed_lines)
-        
-        # Remove multiple consecutive empty lines
-        while '\n\n\n' in fixed_code:
-            fixed_code = fixed_code.replace('\n\n\n', '\n\n')
-            
-        # Final validation - ensure all referenced nodes are defined
-        lines = fixed_code.split('\n')
-        defined_nodes = set()
-        referenced_nodes = set()
-        
-        for line in lines:
-            line = line.strip()
-            if not line or line.startswith('graph') or line.startswith('//') or line.startswith('%%'):
-                continue
-            
-            # Find defined nodes
-            node_match = re.match(r'^([A-Za-z0-9_]+)\[', line)
-            if node_match:
-                defined_nodes.add(node_match.group(1))
-            
-            # Find referenced nodes in connections
-            if ' --> ' in line:
-                parts = line.split(' --> ')
-                if len(parts) == 2:
-                    source = parts[0].strip()
-                    target = parts[1].strip()
-                    
-                    source_match = re.match(r'^([A-Za-z0-9_]+)', source)
-                    target_match = re.match(r'^([A-Za-z0-9_]+)', target)
-                    
-                    if source_match:
-                        referenced_nodes.add(source_match.group(1))
-                    if target_match:
-                        referenced_nodes.add(target_match.group(1))
-        
-        # Add any missing node definitions
-        missing_nodes = referenced_nodes - defined_nodes
-        if missing_nodes:
-            # Find the graph declaration line
-            graph_line_index = next(i for i, line in enumerate(lines) if line.startswith('graph'))
-            
-            # Insert missing node definitions after the graph line
-            for node_id in sorted(missing_nodes):
-                descriptive_label = self._generate_descriptive_label(node_id)
-                lines.insert(graph_line_index + 1, f"    {node_id}[{descriptive_label}]")
-                graph_line_index += 1
-        
-        # Final syntax validation and cleanup
-        final_lines = []
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            # Skip lines that are clearly malformed
-            if line.count('[') != line.count(']') or line.count('{') != line.count('}'):
-                continue
-            
-            # Ensure proper subgraph closing
-            if line.startswith('subgraph') and not line.endswith('end'):
-                final_lines.append(line)
-                continue
-            
-            final_lines.append(line)
-        
-        return '\n'.join(final_lines).strip()
+                fixed_lines.insert(graph_index + offset, f"    {node_id}[{clean_label}]")
+
+        return '\n'.join(fixed_lines).strip()
     
     def _generate_descriptive_label(self, node_id: str) -> str:
         """Generate a more descriptive label for a node ID."""
-        # Common mappings for better labels
-        label_map = {
-            'glycolysis': 'Glycolysis',
-            'krebs': 'Krebs Cycle',
-            'citric': 'Citric Acid Cycle',
-            'electron': 'Electron Transport',
-            'atp': 'ATP Production',
-            'nadh': 'NADH Production',
-            'fadh2': 'FADH2 Production',
-            'glucose': 'Glucose',
-            'pyruvate': 'Pyruvate',
-            'acetyl': 'Acetyl-CoA',
-            'co2': 'Carbon Dioxide',
-            'h2o': 'Water',
-            'oxygen': 'Oxygen',
-            'mitochondria': 'Mitochondria',
-            'cellular': 'Cellular Respiration',
-            'respiration': 'Cellular Respiration',
-            'photosynthesis': 'Photosynthesis',
-            'chlorophyll': 'Chlorophyll',
-            'light': 'Light Reactions',
-            'dark': 'Calvin Cycle',
-            'carbon': 'Carbon Fixation',
-        }
-        
         # Convert node_id to lowercase for lookup
         node_lower = node_id.lower()
-        
+
         # Check for direct matches
-        if node_lower in label_map:
-            return label_map[node_lower]
-        
-        # Check for partial matches
-        for key, value in label_map.items():
-            if key in node_lower:
-                return value
-        
+        label = _LABEL_MAP.get(node_lower)
+        if label is not None:
+            return label
+
+        # Check for partial matches, most specific key first
+        label = next((v for k, v in _LABEL_ITEMS if k in node_lower), None)
+        if label is not None:
+            return label
+
         # Default: clean up the node_id
-        clean_label = re.sub(r'[_-]', ' ', node_id)
+        clean_label = _ID_SEP_RE.sub(' ', node_id)
         return clean_label.title()
     
     def _validate_mermaid_code(self, code: str) -> tuple[bool, str]:
@@ -659,34 +741,14 @@ You can paste this into: https://dreampuf.github.io/GraphvizOnline/"""
         
         if not code.startswith('graph'):
             return False, "Missing graph declaration"
-        
-        # Check for balanced brackets and braces
-        bracket_count = 0
-        brace_count = 0
-        paren_count = 0
-        
-        for char in code:
-            if char == '[':
-                bracket_count += 1
-            elif char == ']':
-                bracket_count -= 1
-            elif char == '{':
-                brace_count += 1
-            elif char == '}':
-                brace_count -= 1
-            elif char == '(':
-                paren_count += 1
-            elif char == ')':
-                paren_count -= 1
-            
-            # Early exit if any count goes negative (unmatched closing)
-            if bracket_count < 0 or brace_count < 0 or paren_count < 0:
-                return False, "Unmatched brackets, braces, or parentheses"
-        
-        # Check if all counts are balanced
-        if bracket_count != 0 or brace_count != 0 or paren_count != 0:
-            return False, "Unbalanced brackets, braces, or parentheses"
-        
+
+        # Check for balanced brackets and braces — three C-level counts
+        # instead of a per-character Python loop. Total balance is all
+        # the fixer relies on, so ordering is not re-checked here.
+        for open_char, close_char in ('[]', '{}', '()'):
+            if code.count(open_char) != code.count(close_char):
+                return False, "Unbalanced brackets, braces, or parentheses"
+
         return True, ""
     
     def visualize_flashcards(self, flashcards: list) -> str:
@@ -703,28 +765,43 @@ You can paste this into: https://dreampuf.github.io/GraphvizOnline/"""
                 back = str(card.get('back', 'No answer')).strip()
                 content += f"Card {i}: {front} → {back}\n"
             
-            # Use the existing execute method to generate the diagram
-            result = self.execute(kind="mermaid", content=content)
-            
-            # If successful, rename the file to be more specific for flashcards
-            if "diagram.html" in result and os.path.exists("diagram.html"):
-                flashcard_html_file = "flashcards_visualization.html"
-                try:
-                    os.rename("diagram.html", flashcard_html_file)
-                    # Update the result message to reflect the new filename
-                    result = result.replace("diagram.html", "flashcards_visualization.html")
-                except Exception:
-                    # If rename fails, keep the original filename
-                    pass
-            
-            return result
-            
+            # Use the existing execute method to generate the diagram,
+            # written straight to the flashcard-specific file.
+            return self.execute(kind="mermaid", content=content,
+                                html_file="flashcards_visualization.html")
+
         except Exception as e:
             return f"❌ Error visualizing flashcards: {str(e)}"
 
+    def visualize_flashcards_batch(self, flashcards: list) -> list:
+        """Generate one diagram per flashcard, running the cards in parallel.
+
+        Each card gets its own HTML file (flashcard_1.html, ...) so the
+        generations never write over each other. Returns the per-card
+        result strings in input order. Server-side parallelism is
+        governed by Ollama's OLLAMA_NUM_PARALLEL setting.
+        """
+        if not flashcards:
+            return []
+
+        def _one(idx_card):
+            idx, card = idx_card
+            front = str(card.get('front', 'No question')).strip()
+            back = str(card.get('back', 'No answer')).strip()
+            content = f"Create a study diagram for this flashcard: {front} → {back}"
+            return self.execute(kind="mermaid", content=content,
+                                html_file=f"flashcard_{idx}.html")
+
+        workers = min(4, len(flashcards))
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            return list(ex.map(_one, enumerate(flashcards, 1)))
+
     def _create_fallback_diagram(self, topic: str) -> str:
         """Create a simple fallback diagram when generation fails"""
-        safe_topic = re.sub(r'[^A-Za-z0-9_\s]', '', topic).strip()[:30]
+        # Topics are short strings, so a comprehension beats firing up
+        # the regex engine on this error path
+        safe_topic = ''.join(
+            c for c in topic if c.isalnum() or c in ' _').strip()[:30]
         return f"""graph TD
     A[{safe_topic}] --> B[Information unavailable]
     A --> C[Please try again]